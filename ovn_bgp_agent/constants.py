@@ -19,6 +19,8 @@ OVN_VIF_PORT_TYPES = ("", "chassisredirect", "virtual")
 
 OVN_VIRTUAL_VIF_PORT_TYPE = "virtual"
 OVN_VM_VIF_PORT_TYPE = ""
+OVN_VM_AND_VIRTUAL_VIF_PORT_TYPES = frozenset((OVN_VM_VIF_PORT_TYPE,
+                                               OVN_VIRTUAL_VIF_PORT_TYPE))
 OVN_PATCH_VIF_PORT_TYPE = "patch"
 OVN_ROUTER_PORT_TYPE = "router"
 OVN_CHASSISREDIRECT_VIF_PORT_TYPE = "chassisredirect"
@@ -31,6 +31,13 @@ class AgentDriverBase(object, metaclass=abc.ABCMeta):
 
         return agent_driver
 
+    def record_failure(self):
+        """Called when an event could not be processed.
+
+        Drivers skipping their sync when nothing changed can use it to retry
+        what failed.
+        """
+
     @abc.abstractmethod
     def expose_ip(self, ip_address):
         raise NotImplementedError()
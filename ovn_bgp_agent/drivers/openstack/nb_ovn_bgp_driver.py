@@ -83,7 +83,7 @@ class NBOVNBGPDriver(driver_api.AgentDriverBase):
 
         self.ovn_routing_tables = {}  # {'br-ex': 200}
         # {'br-ex': [route1, route2]}
-        self.ovn_routing_tables_routes = collections.defaultdict()
+        self.ovn_routing_tables_routes = collections.defaultdict(list)
 
         self.ovn_local_cr_lrps = {}
         self.ovn_local_lrps = {}
@@ -453,10 +453,8 @@ class NBOVNBGPDriver(driver_api.AgentDriverBase):
         if ips_info['cidrs']:
             if not (self.nb_idl.ls_has_virtual_ports(logical_switch) or
                     self.nb_idl.get_active_lsp_on_chassis(self.chassis)):
-                for n_cidr in ips_info['cidrs']:
-                    if (linux_net.get_ip_version(n_cidr) ==
-                            constants.IP_VERSION_6):
-                        proxy_cidr.append(n_cidr)
+                proxy_cidr = [n_cidr for n_cidr in ips_info['cidrs']
+                              if ':' in n_cidr]
         LOG.debug("Deleting BGP route for logical port with ip %s", ips)
         self._withdraw_provider_port(ips, logical_switch, bridge_device,
                                      bridge_vlan, proxy_cidr)
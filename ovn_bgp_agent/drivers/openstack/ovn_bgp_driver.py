@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import collections
+import functools
 import ipaddress
 import threading
 
@@ -41,6 +42,32 @@ LOG = logging.getLogger(__name__)
 OVN_TABLES = ["Port_Binding", "Chassis", "Datapath_Binding", "Load_Balancer",
               "Chassis_Private", "Logical_DP_Group"]
 
+# {is_ipv6: (ip_version, host_mask)}
+_IP_VERSION_AND_HOST_MASK = {
+    False: (constants.IP_VERSION_4, '/32'),
+    True: (constants.IP_VERSION_6, '/128'),
+}
+
+
+def _get_ip_version_and_host_mask(ip):
+    # NOTE: cheaper than netaddr parsing for the plain IPs (or IP/mask
+    # strings) handled in the sync hot loops
+    return _IP_VERSION_AND_HOST_MASK[':' in ip]
+
+
+@functools.lru_cache(maxsize=8192)
+def _get_ip_rule_dst(ip):
+    # NOTE: the ovn ip rules are keyed by their dst (ip/host mask). The same
+    # IPs are looked up on every sync, so reuse the dst strings instead of
+    # formatting new ones each time
+    return ip + _get_ip_version_and_host_mask(ip)[1]
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_network(cidr):
+    # NOTE: the same subnet cidrs are withdrawn over and over on churn
+    return ipaddress.ip_network(cidr, strict=False)
+
 
 class OVNBGPDriver(driver_api.AgentDriverBase):
 
@@ -52,13 +79,25 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
         self.ovn_bridge_mappings = {}  # {'public': 'br-ex'}
         self.ovs_flows = {}
         self.ovn_local_cr_lrps = {}
+        # {provider_datapath: set(cr_lrp_logical_ports)}
+        self._cr_lrps_by_provider_dp = collections.defaultdict(set)
+        # {router_datapath: cr_lrp_logical_port}
+        self._cr_lrp_by_router_dp = {}
         self.ovn_local_lrps = {}
         # {'br-ex': [route1, route2]}
-        self.ovn_routing_tables_routes = collections.defaultdict()
+        self.ovn_routing_tables_routes = collections.defaultdict(list)
         # {ovn_lb: {'ips': [VIP1, VIP2], 'gateway_port': cr-lrpX}
         self.provider_ovn_lbs = collections.defaultdict()
         # {datapath: localnet_port_name}
         self.ovn_provider_datapath = {}
+        # {datapath: (bridge_device, bridge_vlan)}
+        self._datapath_bridges = {}
+        # (sb change_seqno, bridge mappings, failures, host state) of the
+        # last sync
+        self._last_sync_state = None
+        # number of failed events and batched netlink requests, see
+        # record_failure
+        self._failures = 0
 
         self._sb_idl = None
         self._post_fork_event = threading.Event()
@@ -131,20 +170,27 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
 
     @lockutils.synchronized('bgp')
     def sync(self):
+        self._sync()
+
+    def _sync(self):
+        # NOTE: take the SB DB change_seqno before reading anything, so that
+        # any change made while syncing triggers a new sync
+        seqno = self.sb_idl.idl.change_seqno
+        bridge_mappings = self.ovs_idl.get_ovn_bridge_mappings()
+        # NOTE: and the failures count, so that anything failing from now
+        # on is retried by the next sync
+        failures = self._failures
+        last_sync_state, self._last_sync_state = self._last_sync_state, None
+
         self._expose_tenant_networks = (CONF.expose_tenant_networks or
                                         CONF.expose_ipv6_gua_tenant_networks)
         self.ovn_routing_tables = {}
         self.ovn_bridge_mappings = {}
-        self.ovn_local_cr_lrps = {}
-        self.ovn_local_lrps = {}
-        self.ovn_routing_tables_routes = collections.defaultdict()
-        self.provider_ovn_lbs = collections.defaultdict()
         self.ovs_flows = {}
 
         LOG.debug("Configuring br-ex default rule and routing tables for "
                   "each provider network")
-        # 1) Get bridge mappings: xxxx:br-ex,yyyy:br-ex2
-        bridge_mappings = self.ovs_idl.get_ovn_bridge_mappings()
+        # 1) Bridge mappings: xxxx:br-ex,yyyy:br-ex2
         # 2) Get macs for bridge mappings
         extra_routes = {}
 
@@ -189,50 +235,32 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
             ovs.remove_extra_ovs_flows(self.ovs_flows, bridge,
                                        constants.OVS_RULE_COOKIE)
 
-        LOG.debug("Syncing current routes.")
-        exposed_ips = linux_net.get_exposed_ips(CONF.bgp_nic)
+        exposed_ips = set(linux_net.get_exposed_ips(CONF.bgp_nic))
         # get the rules pointing to ovn bridges
         ovn_ip_rules = linux_net.get_ovn_ip_rules(
             self.ovn_routing_tables.values())
 
-        # add missing routes/ips for IPs on provider network
-        ports = self.sb_idl.get_ports_on_chassis(self.chassis)
-        for port in ports:
-            self._ensure_port_exposed(port, exposed_ips, ovn_ip_rules)
-
-        # this information is only available when there are cr-lrps add
-        # missing routes/ips for FIPs associated to VMs/LBs on the chassis
-        cr_lrp_ports = self.sb_idl.get_cr_lrp_ports_on_chassis(
-            self.chassis)
-        for cr_lrp_port in cr_lrp_ports:
-            self._ensure_cr_lrp_associated_ports_exposed(
-                cr_lrp_port, exposed_ips, ovn_ip_rules)
-
-        for cr_lrp_port, cr_lrp_info in self.ovn_local_cr_lrps.items():
-            lrp_ports = self.sb_idl.get_lrp_ports_for_router(
-                cr_lrp_info['router_datapath'])
-            for lrp in lrp_ports:
-                self._process_lrp_port(lrp, cr_lrp_port, exposed_ips,
-                                       ovn_ip_rules)
-
-            # add missing routes/ips related to ovn-octavia loadbalancers
-            # on the provider networks
-            provider_ovn_lbs = self.sb_idl.get_provider_ovn_lbs_on_cr_lrp(
-                cr_lrp_info['provider_datapath'],
-                cr_lrp_info['router_datapath'])
-            for ovn_lb, ovn_lb_ip in provider_ovn_lbs.items():
-                self._expose_ovn_lb_on_provider(ovn_lb_ip,
-                                                ovn_lb,
-                                                cr_lrp_port,
-                                                exposed_ips,
-                                                ovn_ip_rules)
-
-        # remove extra routes/ips
-        # remove all the leftovers on the list of current ips on dev OVN
-        linux_net.delete_exposed_ips(exposed_ips, CONF.bgp_nic)
-        # remove all the leftovers on the list of current ip rules for ovn
-        # bridges
-        linux_net.delete_ip_rules(ovn_ip_rules)
+        # NOTE: the ports sync is only needed if the SB DB or the bridge
+        # mappings changed since the last one, if something failed since
+        # then, or if the IPs, rules and routes it left on the host were
+        # modified (e.g., manually removed)
+        host_state = self._get_host_sync_state(exposed_ips, ovn_ip_rules,
+                                               extra_routes)
+        if (seqno, bridge_mappings, failures, host_state) != last_sync_state:
+            self.ovn_local_cr_lrps = {}
+            self._cr_lrps_by_provider_dp = collections.defaultdict(set)
+            self._cr_lrp_by_router_dp = {}
+            self.ovn_local_lrps = {}
+            self.ovn_routing_tables_routes = collections.defaultdict(list)
+            self.provider_ovn_lbs = collections.defaultdict()
+            # bridge mappings (and localnet ports) may have changed
+            self._datapath_bridges = {}
+            batch = self._sync_ports(exposed_ips, ovn_ip_rules)
+            host_state = self._get_synced_host_state(
+                host_state, batch, exposed_ips, ovn_ip_rules)
+        else:
+            LOG.debug("Nothing changed since the last sync. Skipping the "
+                      "ports sync.")
 
         # remove all the extra rules not needed
         linux_net.delete_bridge_ip_routes(self.ovn_routing_tables,
@@ -242,6 +270,110 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
         wire_utils.delete_vlan_devices_leftovers(self.sb_idl,
                                                  self.ovn_bridge_mappings)
 
+        # NOTE: the extra routes left are the ones just deleted
+        ips, rules, routes = host_state
+        routes = routes - self._get_routes_keys(extra_routes)
+        self._last_sync_state = (seqno, bridge_mappings, failures,
+                                 (ips, rules, routes))
+
+    def _sync_ports(self, exposed_ips, ovn_ip_rules):
+        LOG.debug("Syncing current routes.")
+        # NOTE: the ip addresses, rules and routes added while ensuring the
+        # ports are exposed are applied in batches, instead of one netlink
+        # request (and privsep call) at a time
+        # NOTE: index the Port_Binding table once, instead of searching it
+        # for every lrp port and its associated datapath
+        port_bindings_index = self.sb_idl.get_port_bindings_index()
+
+        # NOTE: the IPs and rules already on the host are not requested
+        # again, so that only the missing ones are added
+        existing_ips = {CONF.bgp_nic: set(exposed_ips)}
+        existing_rules = dict(ovn_ip_rules)
+        with linux_net.NetlinkBatch(
+                existing_ips=existing_ips, existing_rules=existing_rules,
+                on_errors=self._record_batch_errors) as batch:
+            # add missing routes/ips for IPs on provider network
+            ports = self.sb_idl.get_ports_on_chassis(self.chassis)
+            for port in ports:
+                self._ensure_port_exposed(port, exposed_ips, ovn_ip_rules)
+
+            # this information is only available when there are cr-lrps add
+            # missing routes/ips for FIPs associated to VMs/LBs on the chassis
+            cr_lrp_ports = self.sb_idl.get_cr_lrp_ports_on_chassis(
+                self.chassis)
+            for cr_lrp_port in cr_lrp_ports:
+                self._ensure_cr_lrp_associated_ports_exposed(
+                    cr_lrp_port, exposed_ips, ovn_ip_rules)
+
+            for cr_lrp_port, cr_lrp_info in self.ovn_local_cr_lrps.items():
+                if self._expose_tenant_networks:
+                    lrp_ports = port_bindings_index.lrp_ports_by_datapath.get(
+                        cr_lrp_info['router_datapath'], [])
+                    for lrp in lrp_ports:
+                        self._process_lrp_port(
+                            lrp, cr_lrp_port, exposed_ips, ovn_ip_rules,
+                            port_bindings_index=port_bindings_index)
+
+                # add missing routes/ips related to ovn-octavia
+                # loadbalancers on the provider networks
+                provider_ovn_lbs = (
+                    self.sb_idl.get_provider_ovn_lbs_on_cr_lrp(
+                        cr_lrp_info['provider_datapath'],
+                        cr_lrp_info['router_datapath']))
+                for ovn_lb, ovn_lb_ip in provider_ovn_lbs.items():
+                    self._expose_ovn_lb_on_provider(ovn_lb_ip,
+                                                    ovn_lb,
+                                                    cr_lrp_port,
+                                                    exposed_ips,
+                                                    ovn_ip_rules)
+
+        # remove extra routes/ips
+        # remove all the leftovers on the list of current ips on dev OVN
+        linux_net.delete_exposed_ips(exposed_ips, CONF.bgp_nic)
+        # remove all the leftovers on the list of current ip rules for ovn
+        # bridges
+        linux_net.delete_ip_rules(ovn_ip_rules)
+        return batch
+
+    def _get_host_sync_state(self, exposed_ips, ovn_ip_rules, extra_routes):
+        # NOTE: built from what the sync dumps anyway, keyed as the
+        # NetlinkBatch does (see get_state) to compare it with what the
+        # last sync left on the host
+        return (set(exposed_ips), self._get_rules_keys(ovn_ip_rules),
+                self._get_routes_keys(extra_routes))
+
+    def _get_synced_host_state(self, host_state, batch, leftover_ips,
+                               leftover_rules):
+        # NOTE: instead of dumping them again, what was on the host plus the
+        # requests applied by the ports sync, minus the leftovers it deleted
+        ips = {ip for nic, ip in batch.get_state('addr')
+               if nic == CONF.bgp_nic}
+        rules = batch.get_state('rule')
+        routes = host_state[2] | batch.get_state('route')
+        return (ips - leftover_ips,
+                rules - self._get_rules_keys(leftover_rules), routes)
+
+    def _get_rules_keys(self, ovn_ip_rules):
+        rules = set()
+        for rule_dst, rule_info in ovn_ip_rules.items():
+            dst, dst_len = rule_dst.split('/')
+            rules.add((dst, int(dst_len), rule_info['table']))
+        return rules
+
+    def _get_routes_keys(self, extra_routes):
+        return {(self.ovn_routing_tables[bridge], r.get_attr('RTA_DST'),
+                 r['dst_len'], r.get_attr('RTA_GATEWAY'),
+                 r.get_attr('RTA_OIF'))
+                for bridge, routes in extra_routes.items() for r in routes}
+
+    def record_failure(self):
+        # NOTE: so that the next sync does not skip the ports and retries
+        # them
+        self._failures += 1
+
+    def _record_batch_errors(self, errors):
+        self._failures += len(errors)
+
     def _ensure_cr_lrp_associated_ports_exposed(self, cr_lrp_port,
                                                 exposed_ips, ovn_ip_rules):
         ips, patch_port_row = self.sb_idl.get_cr_lrp_nat_addresses_info(
@@ -251,19 +383,14 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
         ips_adv = self._expose_ip(ips, patch_port_row,
                                   associated_port=cr_lrp_port)
         for ip in ips_adv:
-            if exposed_ips and ip in exposed_ips:
-                exposed_ips.remove(ip)
+            if exposed_ips:
+                exposed_ips.discard(ip)
             if ovn_ip_rules:
-                ip_version = linux_net.get_ip_version(ip)
-                if ip_version == constants.IP_VERSION_6:
-                    ip_dst = "{}/128".format(ip)
-                else:
-                    ip_dst = "{}/32".format(ip)
-                ovn_ip_rules.pop(ip_dst, None)
+                ovn_ip_rules.pop(_get_ip_rule_dst(ip), None)
 
-    def _ensure_port_exposed(self, port, exposed_ips, ovn_ip_rules):
+    def _ensure_port_exposed(self, port, exposed_ips=None, ovn_ip_rules=None):
         if port.type not in constants.OVN_VIF_PORT_TYPES or not port.mac:
-            return
+            return []
 
         port_ips = []
         if port.mac == ['unknown']:
@@ -271,35 +398,32 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
             # we can check if it is a VM on the provider and trigger the
             # expose_ip without passing any port_ips
             try:
-                if ((port.type != constants.OVN_VM_VIF_PORT_TYPE and
-                        port.type != constants.OVN_VIRTUAL_VIF_PORT_TYPE) or
+                if (port.type not in
+                        constants.OVN_VM_AND_VIRTUAL_VIF_PORT_TYPES or
                         self.sb_idl.is_provider_network(port.datapath)):
-                    return
+                    return []
             except agent_exc.DatapathNotFound:
                 # There is no need to expose anything related to a removed
                 # datapath
                 LOG.debug("Port %s not being exposed as its datapath %s was "
                           "removed", port.logical_port, port.datapath)
-                return
+                return []
         else:
-            if len(port.mac[0].strip().split(' ')) < 2:
-                return
-            port_ips = port.mac[0].strip().split(' ')[1:]
+            mac_info = port.mac[0].strip().split(' ')
+            if len(mac_info) < 2:
+                return []
+            port_ips = mac_info[1:]
 
-        ips_adv = self._expose_ip(port_ips, port)
+        ips_adv = [port_ip.split("/")[0]
+                   for port_ip in self._expose_ip(port_ips, port)]
 
-        for port_ip in ips_adv:
-            ip_address = port_ip.split("/")[0]
-            if exposed_ips and ip_address in exposed_ips:
+        for ip_address in ips_adv:
+            if exposed_ips:
                 # remove each ip to add from the list of current ips on dev OVN
-                exposed_ips.remove(ip_address)
+                exposed_ips.discard(ip_address)
             if ovn_ip_rules:
-                ip_version = linux_net.get_ip_version(port_ip)
-                if ip_version == constants.IP_VERSION_6:
-                    ip_dst = "{}/128".format(ip_address)
-                else:
-                    ip_dst = "{}/32".format(ip_address)
-                ovn_ip_rules.pop(ip_dst, None)
+                ovn_ip_rules.pop(_get_ip_rule_dst(ip_address), None)
+        return ips_adv
 
     def _expose_provider_port(self, port_ips, provider_datapath,
                               bridge_device=None, bridge_vlan=None,
@@ -326,8 +450,8 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
                                 "ips %s", provider_datapath, port_ips)
                     return False
             except agent_exc.DatapathNotFound:
-                LOG.exception("Provider network not found, no need to expose "
-                              "ips %s", port_ips)
+                LOG.warning("Provider network not found, no need to expose "
+                            "ips %s", port_ips)
                 return False
 
         # Connect to OVN
@@ -343,29 +467,39 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
         except Exception as e:
             LOG.exception("Unexpected exception while wiring provider port: "
                           "%s", e)
+            self.record_failure()
             return False
 
-    def _expose_tenant_port(self, port, ip_version, exposed_ips=None,
-                            ovn_ip_rules=None):
+    def _expose_tenant_ports(self, ports, ip_version, exposed_ips=None,
+                             ovn_ip_rules=None):
+        # NOTE: gather the IPs of all the ports first, so that they are
+        # announced with a single request instead of one per IP
+        tenant_ips = {}  # {ip: ip_rule_dst}
+        for port in ports:
+            tenant_ips.update(self._get_tenant_port_ips(port, ip_version))
+        if not tenant_ips:
+            return
+        bgp_utils.announce_ips(list(tenant_ips))
+        if exposed_ips:
+            exposed_ips.difference_update(tenant_ips)
+        if ovn_ip_rules:
+            for ip_dst in tenant_ips.values():
+                ovn_ip_rules.pop(ip_dst, None)
+
+    def _get_tenant_port_ips(self, port, ip_version):
         # specific case for ovn-lb vips on tenant networks
         if not port.mac and not port.chassis and not port.up[0]:
             ext_n_cidr = port.external_ids.get(
                 constants.OVN_CIDRS_EXT_ID_KEY, "")
             if ext_n_cidr:
-                ovn_lb_ip = ext_n_cidr.split(" ")[0].split("/")[0]
-                bgp_utils.announce_ips([ovn_lb_ip])
-                if exposed_ips and ovn_lb_ip in exposed_ips:
-                    exposed_ips.remove(ovn_lb_ip)
-                if ovn_ip_rules:
-                    ovn_ip_rules.pop(ext_n_cidr.split(" ")[0], None)
-            return
+                ovn_lb_cidr = ext_n_cidr.split(" ")[0]
+                return {ovn_lb_cidr.split("/")[0]: ovn_lb_cidr}
+            return {}
         elif (not port.mac or
-                port.type not in (
-                    constants.OVN_VM_VIF_PORT_TYPE,
-                    constants.OVN_VIRTUAL_VIF_PORT_TYPE) or
+                port.type not in constants.OVN_VM_AND_VIRTUAL_VIF_PORT_TYPES or
                 (port.type == constants.OVN_VM_VIF_PORT_TYPE and
                     not port.chassis)):
-            return
+            return {}
 
         try:
             if port.mac == ['unknown']:
@@ -377,22 +511,15 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
             else:
                 port_ips = port.mac[0].strip().split(' ')[1:]
         except IndexError:
-            return
+            return {}
 
+        tenant_ips = {}
         for port_ip in port_ips:
             # Only adding the port ips that match the lrp
             # IP version
-            port_ip_version = linux_net.get_ip_version(port_ip)
-            if port_ip_version == ip_version:
-                bgp_utils.announce_ips([port_ip])
-                if exposed_ips and port_ip in exposed_ips:
-                    exposed_ips.remove(port_ip)
-                if ovn_ip_rules:
-                    if port_ip_version == constants.IP_VERSION_6:
-                        ip_dst = "{}/128".format(port_ip)
-                    else:
-                        ip_dst = "{}/32".format(port_ip)
-                    ovn_ip_rules.pop(ip_dst, None)
+            if _get_ip_version_and_host_mask(port_ip)[0] == ip_version:
+                tenant_ips[port_ip] = _get_ip_rule_dst(port_ip)
+        return tenant_ips
 
     def _withdraw_provider_port(self, port_ips, provider_datapath,
                                 bridge_device=None, bridge_vlan=None,
@@ -417,24 +544,36 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
         except Exception as e:
             LOG.exception("Unexpected exception while unwiring provider port: "
                           "%s", e)
+            self.record_failure()
             return False
 
     def _get_bridge_for_datapath(self, datapath):
+        bridge_info = self._datapath_bridges.get(datapath)
+        if bridge_info:
+            return bridge_info
         network_name, network_tag = self.sb_idl.get_network_name_and_tag(
             datapath, self.ovn_bridge_mappings.keys())
         if network_name:
-            if network_tag:
-                return self.ovn_bridge_mappings[network_name], network_tag[0]
-            return self.ovn_bridge_mappings[network_name], None
+            bridge_vlan = network_tag[0] if network_tag else None
+            bridge_info = (self.ovn_bridge_mappings[network_name],
+                           bridge_vlan)
+            self._datapath_bridges[datapath] = bridge_info
+            return bridge_info
         return None, None
 
-    @lockutils.synchronized('bgp')
     def expose_ovn_lb(self, ip, row):
-        self._process_ovn_lb(ip, row, constants.EXPOSE)
+        # NOTE: tenant network loadbalancers are only exposed if tenant
+        # networks are, no need to wait for the lock otherwise
+        if not self._expose_tenant_networks:
+            return
+        with lockutils.lock('bgp'):
+            self._process_ovn_lb(ip, row, constants.EXPOSE)
 
-    @lockutils.synchronized('bgp')
     def withdraw_ovn_lb(self, ip, row):
-        self._process_ovn_lb(ip, row, constants.WITHDRAW)
+        if not self._expose_tenant_networks:
+            return
+        with lockutils.lock('bgp'):
+            self._process_ovn_lb(ip, row, constants.WITHDRAW)
 
     def _process_ovn_lb(self, ip, row, action):
         try:
@@ -485,15 +624,10 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
             LOG.debug("Failure adding BGP route for loadbalancer VIP %s", ip)
             return False
         LOG.debug("Added BGP route for loadbalancer VIP %s", ip)
-        if exposed_ips and ip in exposed_ips:
-            exposed_ips.remove(ip)
+        if exposed_ips:
+            exposed_ips.discard(ip)
         if ovn_ip_rules:
-            ip_version = linux_net.get_ip_version(ip)
-            if ip_version == constants.IP_VERSION_6:
-                ip_dst = "{}/128".format(ip)
-            else:
-                ip_dst = "{}/32".format(ip)
-            ovn_ip_rules.pop(ip_dst, None)
+            ovn_ip_rules.pop(_get_ip_rule_dst(ip), None)
         return True
 
     def _withdraw_ovn_lb_on_provider(self, lb_name, cr_lrp):
@@ -540,8 +674,7 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
         self._expose_ip(ips, row, associated_port)
 
     def _expose_ip(self, ips, row, associated_port=None):
-        if (row.type == constants.OVN_VM_VIF_PORT_TYPE or
-                row.type == constants.OVN_VIRTUAL_VIF_PORT_TYPE):
+        if row.type in constants.OVN_VM_AND_VIRTUAL_VIF_PORT_TYPES:
             try:
                 provider_network = self.sb_idl.is_provider_network(
                     row.datapath)
@@ -614,9 +747,9 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
                 LOG.debug("Failure adding BGP route for FIP with ip %s", ips)
                 return []
 
-        # CR-LRP Port
-        elif (row.type == constants.OVN_CHASSISREDIRECT_VIF_PORT_TYPE and
-              row.logical_port.startswith('cr-')):
+        # CR-LRP Port (northd always names the chassisredirect ports as
+        # cr-<lrp name>, so there is no need to check the prefix)
+        elif row.type == constants.OVN_CHASSISREDIRECT_VIF_PORT_TYPE:
             cr_lrp_datapath = self.sb_idl.get_provider_datapath_from_cr_lrp(
                 row.logical_port)
             if not cr_lrp_datapath:
@@ -635,6 +768,10 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
                 'router_datapath': row.datapath,
                 'provider_datapath': cr_lrp_datapath,
                 'ips': ips,
+                # pre-computed for the lrp (tenant networks) handling
+                'ips_without_mask': [ip.partition('/')[0] for ip in ips],
+                'ip_versions': {_get_ip_version_and_host_mask(ip)[0]
+                                for ip in ips},
                 'mac': mac,
                 'subnets_datapath': {},
                 'subnets_cidr': [],
@@ -642,6 +779,9 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
                 'bridge_vlan': bridge_vlan,
                 'bridge_device': bridge_device
             }
+            self._cr_lrps_by_provider_dp[cr_lrp_datapath].add(
+                row.logical_port)
+            self._cr_lrp_by_router_dp[row.datapath] = row.logical_port
 
             if self._expose_cr_lrp_port(ips, mac, bridge_device, bridge_vlan,
                                         router_datapath=row.datapath,
@@ -667,8 +807,10 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
         - VM FIP, or
         - CR-LRP OVN port
         '''
-        if (row.type == constants.OVN_VM_VIF_PORT_TYPE or
-                row.type == constants.OVN_VIRTUAL_VIF_PORT_TYPE):
+        self._withdraw_ip(ips, row, associated_port)
+
+    def _withdraw_ip(self, ips, row, associated_port=None):
+        if row.type in constants.OVN_VM_AND_VIRTUAL_VIF_PORT_TYPES:
             try:
                 provider_network = self.sb_idl.is_provider_network(
                     row.datapath)
@@ -696,10 +838,8 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
                         self.sb_idl.get_virtual_ports_on_datapath_by_chassis(
                             row.datapath, self.chassis))
                     if not virtual_provider_ports:
-                        cr_lrps_on_same_provider = [
-                            p for p in self.ovn_local_cr_lrps.values()
-                            if p['provider_datapath'] == row.datapath]
-                        if not cr_lrps_on_same_provider:
+                        if not self._get_cr_lrps_count_on_provider(
+                                row.datapath):
                             bridge_device, bridge_vlan = (
                                 self._get_bridge_for_datapath(row.datapath))
                             # NOTE: This is neutron specific as we need the
@@ -759,8 +899,7 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
                 return
 
         # CR-LRP Port
-        elif (row.type == constants.OVN_CHASSISREDIRECT_VIF_PORT_TYPE and
-              row.logical_port.startswith('cr-')):
+        elif row.type == constants.OVN_CHASSISREDIRECT_VIF_PORT_TYPE:
             cr_lrp_datapath = self.ovn_local_cr_lrps.get(
                 row.logical_port, {}).get('provider_datapath')
             if not cr_lrp_datapath:
@@ -775,9 +914,11 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
                                        provider_datapath=cr_lrp_datapath,
                                        cr_lrp_port=row.logical_port)
 
-    @lockutils.synchronized('bgp')
     def expose_remote_ip(self, ips, row):
-        self._expose_remote_ip(ips, row)
+        if not self._expose_tenant_networks:
+            return
+        with lockutils.lock('bgp'):
+            self._expose_remote_ip(ips, row)
 
     def _expose_remote_ip(self, ips, row):
         try:
@@ -809,7 +950,7 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
 
         port_lrps = self.sb_idl.get_lrps_for_datapath(row.datapath)
         for port_lrp in port_lrps:
-            if port_lrp in self.ovn_local_lrps.keys():
+            if port_lrp in self.ovn_local_lrps:
                 LOG.debug("Adding BGP route for tenant IP %s on chassis %s",
                           ips_to_expose, self.chassis)
                 bgp_utils.announce_ips(ips_to_expose)
@@ -817,9 +958,11 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
                           ips_to_expose, self.chassis)
                 break
 
-    @lockutils.synchronized('bgp')
     def withdraw_remote_ip(self, ips, row, chassis=None):
-        self._withdraw_remote_ip(ips, row, chassis)
+        if not self._expose_tenant_networks:
+            return
+        with lockutils.lock('bgp'):
+            self._withdraw_remote_ip(ips, row, chassis)
 
     def _withdraw_remote_ip(self, ips, row, chassis=None):
         try:
@@ -852,7 +995,7 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
             return
         port_lrps = self.sb_idl.get_lrps_for_datapath(row.datapath)
         for port_lrp in port_lrps:
-            if port_lrp in self.ovn_local_lrps.keys():
+            if port_lrp in self.ovn_local_lrps:
                 LOG.debug("Deleting BGP route for tenant IP %s on chassis %s",
                           ips_to_withdraw, self.chassis)
                 bgp_utils.withdraw_ips(ips_to_withdraw)
@@ -861,7 +1004,7 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
                 break
 
     def _process_lrp_port(self, lrp, associated_cr_lrp, exposed_ips=None,
-                          ovn_ip_rules=None):
+                          ovn_ip_rules=None, port_bindings_index=None):
         if (lrp.chassis or
                 not lrp.logical_port.startswith('lrp-') or
                 "chassis-redirect-port" in lrp.options.keys() or
@@ -875,19 +1018,24 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
                 # This should not happen: subnet without CIDR
                 return
 
-            if not lrp.options.get('peer'):
+            peer = lrp.options.get('peer')
+            if not peer:
                 # if there is no peer associated to the port we need to
                 # 1) creation: wait for another re-sync to expose it
                 # 2) deletion: no need to add it as it being removed
                 return
-            if not self._address_scope_allowed(lrp_ip, lrp.options['peer']):
+            if not self._address_scope_allowed(lrp_ip, peer):
                 return
-            subnet_datapath = self.sb_idl.get_port_datapath(
-                lrp.options['peer'])
+            if port_bindings_index:
+                peer_port = port_bindings_index.port_by_name.get(peer)
+                subnet_datapath = peer_port.datapath if peer_port else None
+            else:
+                subnet_datapath = self.sb_idl.get_port_datapath(peer)
             self._expose_lrp_port(lrp_ip, lrp.logical_port,
                                   associated_cr_lrp, subnet_datapath,
                                   exposed_ips=exposed_ips,
-                                  ovn_ip_rules=ovn_ip_rules)
+                                  ovn_ip_rules=ovn_ip_rules,
+                                  port_bindings_index=port_bindings_index)
 
     def _expose_cr_lrp_port(self, ips, mac, bridge_device, bridge_vlan,
                             router_datapath, provider_datapath, cr_lrp_port):
@@ -911,9 +1059,11 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
 
         # Check if there are networks attached to the router,
         # and if so, add the needed routes/rules
-        lrp_ports = self.sb_idl.get_lrp_ports_for_router(router_datapath)
-        for lrp in lrp_ports:
-            self._process_lrp_port(lrp, cr_lrp_port)
+        # (only needed if tenant networks are exposed)
+        if self._expose_tenant_networks:
+            lrp_ports = self.sb_idl.get_lrp_ports_for_router(router_datapath)
+            for lrp in lrp_ports:
+                self._process_lrp_port(lrp, cr_lrp_port)
 
         cr_lrp_provider_dp = self.ovn_local_cr_lrps[cr_lrp_port][
             'provider_datapath']
@@ -933,17 +1083,11 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
         # Removing information about the associated network for
         # tenant network advertisement
         ips_without_mask = [ip.split("/")[0] for ip in ips]
-        # del proxy ndp config for ipv6
+        # del proxy ndp config for ipv6, if no other cr-lrp port on the same
+        # provider needs it
         proxy_cidrs = []
-        for ip in ips_without_mask:
-            if linux_net.get_ip_version(ip) == constants.IP_VERSION_6:
-                cr_lrps_on_same_provider = [
-                    p for p in self.ovn_local_cr_lrps.values()
-                    if p['provider_datapath'] == provider_datapath]
-                # if no other cr-lrp port on the same provider
-                # delete the ndp proxy
-                if (len(cr_lrps_on_same_provider) <= 1):
-                    proxy_cidrs.append(ip)
+        if self._get_cr_lrps_count_on_provider(provider_datapath) <= 1:
+            proxy_cidrs = [ip for ip in ips_without_mask if ':' in ip]
 
         if not self._withdraw_provider_port(
                 ips_without_mask, provider_datapath,
@@ -965,6 +1109,10 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
             'provider_ovn_lbs'].copy()
         for provider_ovn_lb in provider_ovn_lbs:
             self._withdraw_ovn_lb_on_provider(provider_ovn_lb, cr_lrp_port)
+        self._cr_lrps_by_provider_dp[provider_datapath].discard(cr_lrp_port)
+        router_datapath = local_cr_lrp_info.get('router_datapath')
+        if self._cr_lrp_by_router_dp.get(router_datapath) == cr_lrp_port:
+            del self._cr_lrp_by_router_dp[router_datapath]
         try:
             del self.ovn_local_cr_lrps[cr_lrp_port]
         except KeyError:
@@ -972,8 +1120,13 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
                       cr_lrp_port)
         return True
 
+    def _get_cr_lrps_count_on_provider(self, provider_datapath):
+        cr_lrps = self._cr_lrps_by_provider_dp.get(provider_datapath)
+        return len(cr_lrps) if cr_lrps else 0
+
     def _expose_lrp_port(self, ip, lrp, associated_cr_lrp, subnet_datapath,
-                         exposed_ips=None, ovn_ip_rules=None):
+                         exposed_ips=None, ovn_ip_rules=None,
+                         port_bindings_index=None):
         if not self._expose_tenant_networks:
             return
         if not CONF.expose_tenant_networks:
@@ -981,11 +1134,10 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
             if not driver_utils.is_ipv6_gua(ip):
                 return
         cr_lrp_info = self.ovn_local_cr_lrps.get(associated_cr_lrp, {})
-        cr_lrp_ips = [ip_address.split('/')[0]
-                      for ip_address in cr_lrp_info.get('ips', [])]
+        cr_lrp_ips = cr_lrp_info.get('ips_without_mask', [])
 
         # this is the router gateway port
-        if ip.split('/')[0] in cr_lrp_ips:
+        if ip.partition('/')[0] in cr_lrp_ips:
             return
 
         cr_lrp_datapath = cr_lrp_info.get('provider_datapath')
@@ -1000,26 +1152,35 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
         cr_lrp_info['subnets_cidr'].append(ip)
         self.ovn_local_lrps.update({lrp: associated_cr_lrp})
 
+        # NOTE: the rule and route for the subnet and the IPs and rules for
+        # the VMs on it are applied through a single privileged call (merged
+        # into the sync batch when resyncing). The batch is flushed when
+        # leaving the with block, so its errors are handled here too
         try:
-            if not wire_utils.wire_lrp_port(
-                    self.ovn_routing_tables_routes, ip, bridge_device,
-                    bridge_vlan, self.ovn_routing_tables, cr_lrp_ips):
-                LOG.warning("Not able to expose subnet with IP %s", ip)
-                return
+            with linux_net.NetlinkBatch(
+                    on_errors=self._record_batch_errors):
+                if not wire_utils.wire_lrp_port(
+                        self.ovn_routing_tables_routes, ip, bridge_device,
+                        bridge_vlan, self.ovn_routing_tables, cr_lrp_ips):
+                    LOG.warning("Not able to expose subnet with IP %s", ip)
+                    return
+                if ovn_ip_rules:
+                    ovn_ip_rules.pop(ip, None)
+
+                # Check if there are VMs on the network
+                # and if so expose the route
+                if port_bindings_index:
+                    ports = port_bindings_index.ports_by_datapath.get(
+                        subnet_datapath, [])
+                else:
+                    ports = self.sb_idl.get_ports_on_datapath(subnet_datapath)
+                ip_version = _get_ip_version_and_host_mask(ip)[0]
+                self._expose_tenant_ports(ports, ip_version=ip_version,
+                                          exposed_ips=exposed_ips,
+                                          ovn_ip_rules=ovn_ip_rules)
         except Exception as e:
             LOG.exception("Unexpected exception while wiring lrp port: %s", e)
-            return
-        if ovn_ip_rules:
-            ovn_ip_rules.pop(ip, None)
-
-        # Check if there are VMs on the network
-        # and if so expose the route
-        ports = self.sb_idl.get_ports_on_datapath(subnet_datapath)
-        ip_version = linux_net.get_ip_version(ip)
-        for port in ports:
-            self._expose_tenant_port(port, ip_version=ip_version,
-                                     exposed_ips=exposed_ips,
-                                     ovn_ip_rules=ovn_ip_rules)
+            self.record_failure()
 
     def _withdraw_lrp_port(self, ip, lrp, associated_cr_lrp):
         if not self._expose_tenant_networks:
@@ -1032,110 +1193,77 @@ class OVNBGPDriver(driver_api.AgentDriverBase):
 
         exposed_lrp = False
         if lrp:
-            if lrp in self.ovn_local_lrps.keys():
-                exposed_lrp = True
-                self.ovn_local_lrps.pop(lrp)
+            exposed_lrp = self.ovn_local_lrps.pop(lrp, None) is not None
         else:
-            for subnet_lp in cr_lrp_info['subnets_datapath'].keys():
-                if subnet_lp in self.ovn_local_lrps.keys():
+            for subnet_lp in cr_lrp_info['subnets_datapath']:
+                if self.ovn_local_lrps.pop(subnet_lp, None) is not None:
                     exposed_lrp = True
-                    self.ovn_local_lrps.pop(subnet_lp)
                     break
         cr_lrp_info['subnets_datapath'].pop(lrp, None)
         if not exposed_lrp:
             return
 
-        cr_lrp_ips = [ip_address.split('/')[0]
-                      for ip_address in cr_lrp_info.get('ips', [])]
+        cr_lrp_ips = cr_lrp_info.get('ips_without_mask', [])
         bridge_device = cr_lrp_info.get('bridge_device')
         bridge_vlan = cr_lrp_info.get('bridge_vlan')
 
-        ip_version = linux_net.get_ip_version(ip)
-        for cr_lrp_ip in cr_lrp_ips:
-            cr_lrp_ip_version = linux_net.get_ip_version(cr_lrp_ip)
-            if cr_lrp_ip_version != ip_version:
-                continue
-            if cr_lrp_ip_version == constants.IP_VERSION_6:
-                net = ipaddress.IPv6Network(ip, strict=False)
-            else:
-                net = ipaddress.IPv4Network(ip, strict=False)
-            break
-
-        # Check if there are VMs on the network
-        # and if so withdraw the routes
-        if net:
-            vms_on_net = linux_net.get_exposed_ips_on_network(
-                CONF.bgp_nic, net)
-            linux_net.delete_exposed_ips(vms_on_net, CONF.bgp_nic)
-
-        # Disconnect the network to OVN
+        # NOTE: as when exposing it, the errors flushing the batch are
+        # handled too
         try:
-            wire_utils.unwire_lrp_port(
-                self.ovn_routing_tables_routes, ip, bridge_device, bridge_vlan,
-                self.ovn_routing_tables, cr_lrp_ips)
+            with linux_net.NetlinkBatch(
+                    on_errors=self._record_batch_errors):
+                # Check if there are VMs on the network (only if the gateway
+                # has an IP of the same version) and if so withdraw the routes
+                ip_version = _get_ip_version_and_host_mask(ip)[0]
+                if ip_version in cr_lrp_info.get('ip_versions', ()):
+                    net = _get_network(ip)
+                    linux_net.delete_exposed_ips_on_network(CONF.bgp_nic, net)
+
+                # Disconnect the network to OVN
+                wire_utils.unwire_lrp_port(
+                    self.ovn_routing_tables_routes, ip, bridge_device,
+                    bridge_vlan, self.ovn_routing_tables, cr_lrp_ips)
         except Exception as e:
             LOG.exception("Unexpected exception while unwiring lrp port: %s",
                           e)
+            self.record_failure()
 
     @lockutils.synchronized('bgp')
     def expose_subnet(self, ip, row):
-        try:
-            cr_lrp = self.sb_idl.is_router_gateway_on_chassis(
-                row.datapath, self.chassis)
-        except agent_exc.DatapathNotFound:
-            # It seems it may also happen that router gets deleted before the
-            # subnet attachment to it gets processed, and in that case there
-            # is no need to expose anything
+        self._expose_subnet(ip, row)
+
+    def _expose_subnet(self, ip, row):
+        # NOTE: only the router gateways (cr-lrps) exposed on this chassis
+        # matter, so there is no need to look for them in the SB DB
+        cr_lrp = self._cr_lrp_by_router_dp.get(row.datapath)
+        if not cr_lrp:
             return
-        if not row.options.get('peer'):
+        peer = row.options.get('peer')
+        if not peer:
             # if there is no peer associated to the port we need to
             # 1) creation: wait for another re-sync to expose it
             # 2) deletion: no need to add it as it being removed
             return
-        subnet_datapath = self.sb_idl.get_port_datapath(
-            row.options['peer'])
+        subnet_datapath = self.sb_idl.get_port_datapath(peer)
 
-        if not cr_lrp or not self.ovn_local_cr_lrps.get(cr_lrp):
-            return
-
-        if not self._address_scope_allowed(ip, row.options['peer']):
+        if not self._address_scope_allowed(ip, peer):
             return
 
         self._expose_lrp_port(ip, row.logical_port, cr_lrp, subnet_datapath)
 
     @lockutils.synchronized('bgp')
     def withdraw_subnet(self, ip, row):
-        try:
-            cr_lrp = self.sb_idl.is_router_gateway_on_chassis(
-                row.datapath, self.chassis)
-        except agent_exc.DatapathNotFound:
-            # NOTE(ltomasbo): This happens when the router (datapath) gets
-            # deleted at the same time as subnets are detached from it.
-            # Usually this will be hit when router is deleted without
-            # removing its gateway. In that case we don't need to withdraw
-            # the subnet as it is not exposed, just the cr-lrp which is
-            # handle in a different event/method (withdraw_ip)
-            LOG.debug("Router is being deleted, so it's datapath does "
-                      "not exists any more. Checking if port %s belongs "
-                      "to chassis redirect and skip in that case.",
-                      row.logical_port)
-            cr_lrp = [cr_lrp_name
-                      for cr_lrp_name in self.ovn_local_cr_lrps.keys()
-                      if row.logical_port in cr_lrp_name]
-            # if cr_lrp exists, this means the lrp port is for the router
-            # gateway, so there is no need to proceed
-            if cr_lrp:
-                LOG.debug("Port %s is related to chassis redirect, so "
-                          "there is no need to do further actions for "
-                          "subnet withdrawal, as this port was not "
-                          "triggering a subnet exposure.",
-                          row.logical_port)
-                return
-        if not cr_lrp or not self.ovn_local_cr_lrps.get(cr_lrp):
+        self._withdraw_subnet(ip, row)
+
+    def _withdraw_subnet(self, ip, row):
+        cr_lrp = self._cr_lrp_by_router_dp.get(row.datapath)
+        if not cr_lrp:
             # NOTE(ltomasbo) there is a chance the cr-lrp just got moved
             # to this node but was not yet processed. In that case there
             # is no need to withdraw the network as it was not exposed here
             return
+        # NOTE: the router gateway port itself (e.g., when the router gets
+        # deleted) is not in ovn_local_lrps, so _withdraw_lrp_port skips it
 
         self._withdraw_lrp_port(ip, row.logical_port, cr_lrp)
 
@@ -42,6 +42,20 @@ EVPN_INFO = collections.namedtuple(
                  'veth_vrf', 'veth_ovs', 'vlan_name'])
 
 
+def _get_port_ips(port):
+    # NOTE: the port mac column is 'mac ip1 [ip2 ...]'
+    if not port.mac:
+        return []
+    return port.mac[0].strip().split(' ')[1:]
+
+
+def _get_cr_lrp_ip(cr_lrp_info, is_ipv6):
+    # NOTE: only the first cr-lrp IP of the given IP version is used as
+    # gateway, no need to parse the rest of them
+    return next((ip.partition('/')[0] for ip in cr_lrp_info.get('ips', [])
+                 if (':' in ip) == is_ipv6), None)
+
+
 class OVNEVPNDriver(driver_api.AgentDriverBase):
 
     def __init__(self):
@@ -51,6 +65,8 @@ class OVNEVPNDriver(driver_api.AgentDriverBase):
         # {'br-ex': [route1, route2]}
         self._ovn_routing_tables_routes = collections.defaultdict()
         self._ovn_exposed_evpn_ips = collections.defaultdict()
+        # {datapath: (bridge_device, bridge_vlan)}
+        self._datapath_bridges = {}
 
         self._sb_idl = None
         self._post_fork_event = threading.Event()
@@ -108,6 +124,8 @@ class OVNEVPNDriver(driver_api.AgentDriverBase):
         self.ovn_local_lrps = {}
         self._ovn_routing_tables_routes = collections.defaultdict()
         self._ovn_exposed_evpn_ips = collections.defaultdict()
+        # bridge mappings (and localnet ports) may have changed
+        self._datapath_bridges = {}
 
         # 1) Get bridge mappings: xxxx:br-ex,yyyy:br-ex2
         bridge_mappings = self.ovs_idl.get_ovn_bridge_mappings()
@@ -141,13 +159,12 @@ class OVNEVPNDriver(driver_api.AgentDriverBase):
                       "Not exposing it.", router_port)
             return
 
-        gateway_ips = [ip.split('/')[0] for ip in gateway['ips']]
         try:
             router_port_ip = router_port.mac[0].strip().split(' ')[1]
         except IndexError:
             return
-        router_ip = router_port_ip.split('/')[0]
-        if router_ip in gateway_ips:
+        router_ip = router_port_ip.partition('/')[0]
+        if any(ip.partition('/')[0] == router_ip for ip in gateway['ips']):
             return
         self.ovn_local_lrps[router_port.logical_port] = {
             'datapath': router_port.datapath,
@@ -156,19 +173,26 @@ class OVNEVPNDriver(driver_api.AgentDriverBase):
         datapath_bridge, vlan_tag = self._get_bridge_for_datapath(
             gateway['provider_datapath'])
 
-        network_datapath = self.sb_idl.get_port_datapath(
-            router_port.options['peer'])
+        # NOTE: without peer there are no VMs on the network to expose yet
+        peer = router_port.options.get('peer')
+        network_datapath = (self.sb_idl.get_port_datapath(peer)
+                            if peer else None)
 
-        self._expose_subnet(router_port_ip, gateway_ips, gateway,
-                            datapath_bridge, vlan_tag, network_datapath)
+        self._expose_subnet(router_port_ip, gateway, datapath_bridge,
+                            vlan_tag, network_datapath)
 
     def _get_bridge_for_datapath(self, datapath):
+        bridge_info = self._datapath_bridges.get(datapath)
+        if bridge_info:
+            return bridge_info
         network_name, network_tag = self.sb_idl.get_network_name_and_tag(
             datapath, self.ovn_bridge_mappings.keys())
         if network_name:
-            if network_tag:
-                return self.ovn_bridge_mappings[network_name], network_tag[0]
-            return self.ovn_bridge_mappings[network_name], None
+            bridge_vlan = network_tag[0] if network_tag else None
+            bridge_info = (self.ovn_bridge_mappings[network_name],
+                           bridge_vlan)
+            self._datapath_bridges[datapath] = bridge_info
+            return bridge_info
         return None, None
 
     @lockutils.synchronized('evpn')
@@ -248,7 +272,7 @@ class OVNEVPNDriver(driver_api.AgentDriverBase):
                                   evpn_info['vni'], evpn_devices.vlan_name,
                                   vlan_tag)
 
-        ips_without_mask = [ip.split("/")[0] for ip in ips]
+        ips_without_mask = [ip.partition('/')[0] for ip in ips]
         nei_dev = evpn_devices.vlan_name if vlan_tag else evpn_devices.veth_vrf
         for ip in ips_without_mask:
             linux_net.add_ip_nei(
@@ -408,18 +432,16 @@ class OVNEVPNDriver(driver_api.AgentDriverBase):
                       cr_lrp_info.get('bgp_as'), evpn_info)
             return
 
-        cr_lrp_ips = [ip_address.split('/')[0]
-                      for ip_address in cr_lrp_info.get('ips', [])]
         datapath_bridge, vlan_tag = self._get_bridge_for_datapath(
             cr_lrp_datapath)
 
-        self._expose_subnet(ip, cr_lrp_ips, cr_lrp_info, datapath_bridge,
-                            vlan_tag, row.datapath)
+        self._expose_subnet(ip, cr_lrp_info, datapath_bridge, vlan_tag,
+                            row.datapath)
 
-    def _expose_subnet(self, router_interface, cr_lrp_ips, cr_lrp_info,
-                       datapath_bridge, vlan_tag, network_datapath):
-        router_interface_ip_version = linux_net.get_ip_version(
-            router_interface)
+    def _expose_subnet(self, router_interface, cr_lrp_info, datapath_bridge,
+                       vlan_tag, network_datapath):
+        router_ip, _, router_mask = router_interface.partition('/')
+        is_ipv6 = ':' in router_ip
         if vlan_tag:
             dev = cr_lrp_info['vlan']
             dev_ovs = dev
@@ -429,24 +451,18 @@ class OVNEVPNDriver(driver_api.AgentDriverBase):
             dev_ovs = cr_lrp_info['veth_ovs']
             strip_vlan = False
 
-        for cr_lrp_ip in cr_lrp_ips:
-            if (linux_net.get_ip_version(cr_lrp_ip) ==
-                    router_interface_ip_version):
-                linux_net.add_ip_route(
-                    self._ovn_routing_tables_routes,
-                    router_interface.split("/")[0],
-                    cr_lrp_info['vni'],
-                    dev,
-                    mask=router_interface.split("/")[1],
-                    via=cr_lrp_ip)
-                break
-
-        if router_interface_ip_version == constants.IP_VERSION_6:
-            net_ip = '{}'.format(ipaddress.IPv6Network(
-                router_interface, strict=False))
-        else:
-            net_ip = '{}'.format(ipaddress.IPv4Network(
-                router_interface, strict=False))
+        cr_lrp_ip = _get_cr_lrp_ip(cr_lrp_info, is_ipv6)
+        if cr_lrp_ip:
+            linux_net.add_ip_route(
+                self._ovn_routing_tables_routes,
+                router_ip,
+                cr_lrp_info['vni'],
+                dev,
+                mask=router_mask,
+                via=cr_lrp_ip)
+
+        net_ip = '{}'.format(ipaddress.ip_network(router_interface,
+                                                  strict=False))
 
         # NOTE(ltomasbo): strip_vlan is used for subnets/routers associated to
         # provider vlan networks assuming the EVPN VXLAN header is replacing
@@ -466,29 +482,22 @@ class OVNEVPNDriver(driver_api.AgentDriverBase):
         # and if so expose the route
         if not network_datapath:
             return
-        ports = self.sb_idl.get_ports_on_datapath(
-            network_datapath)
-        for port in ports:
-            if (port.type not in (constants.OVN_VM_VIF_PORT_TYPE,
-                                  constants.OVN_VIRTUAL_VIF_PORT_TYPE) or
-                (port.type == constants.OVN_VM_VIF_PORT_TYPE and
-                 not port.chassis)):
-                continue
-            try:
-                port_ips = port.mac[0].strip().split(' ')[1:]
-            except IndexError:
-                continue
-
-            for port_ip in port_ips:
-                # Only adding the port ips that match the lrp
-                # IP version
-                port_ip_version = linux_net.get_ip_version(port_ip)
-                if port_ip_version == router_interface_ip_version:
-                    linux_net.add_ips_to_dev(
-                        cr_lrp_info['lo'], [port_ip],
-                        clear_local_route_at_table=cr_lrp_info['vni'])
-                    self._ovn_exposed_evpn_ips.setdefault(
-                        cr_lrp_info['lo'], []).extend([port_ip])
+        ports = self.sb_idl.get_vm_ports_on_datapath(network_datapath)
+        # NOTE: only adding the port ips that match the lrp IP version, all
+        # of them at once
+        port_ips = [
+            port_ip
+            for port in ports
+            if port.chassis or port.type != constants.OVN_VM_VIF_PORT_TYPE
+            for port_ip in _get_port_ips(port)
+            if (':' in port_ip) == is_ipv6]
+        if not port_ips:
+            return
+        linux_net.add_ips_to_dev(
+            cr_lrp_info['lo'], port_ips,
+            clear_local_route_at_table=cr_lrp_info['vni'])
+        self._ovn_exposed_evpn_ips.setdefault(
+            cr_lrp_info['lo'], []).extend(port_ips)
 
     @lockutils.synchronized('evpn')
     def withdraw_subnet(self, row):
@@ -513,8 +522,6 @@ class OVNEVPNDriver(driver_api.AgentDriverBase):
             LOG.info("Subnet not connected to the provider network. "
                      "No need to withdraw it from EVPN")
             return
-        cr_lrp_ips = [ip_address.split('/')[0]
-                      for ip_address in cr_lrp_info.get('ips', [])]
         datapath_bridge, vlan_tag = self._get_bridge_for_datapath(
             cr_lrp_datapath)
 
@@ -523,22 +530,20 @@ class OVNEVPNDriver(driver_api.AgentDriverBase):
         else:
             dev = cr_lrp_info['veth_vrf']
 
-        ip_version = linux_net.get_ip_version(ip)
-        for cr_lrp_ip in cr_lrp_ips:
-            if linux_net.get_ip_version(cr_lrp_ip) == ip_version:
-                linux_net.del_ip_route(
-                    self._ovn_routing_tables_routes,
-                    ip.split("/")[0],
-                    cr_lrp_info['vni'],
-                    dev,
-                    mask=ip.split("/")[1],
-                    via=cr_lrp_ip)
-                if (linux_net.get_ip_version(cr_lrp_ip) ==
-                        constants.IP_VERSION_6):
-                    net = ipaddress.IPv6Network(ip, strict=False)
-                else:
-                    net = ipaddress.IPv4Network(ip, strict=False)
-                break
+        ip_address, _, ip_mask = ip.partition('/')
+        is_ipv6 = ':' in ip_address
+        cr_lrp_ip = _get_cr_lrp_ip(cr_lrp_info, is_ipv6)
+        if cr_lrp_ip:
+            linux_net.del_ip_route(
+                self._ovn_routing_tables_routes,
+                ip_address,
+                cr_lrp_info['vni'],
+                dev,
+                mask=ip_mask,
+                via=cr_lrp_ip)
+        # NOTE: the network flows and IPs are exposed (and so need to be
+        # withdrawn) even if there is no cr-lrp IP of the same IP version
+        net = ipaddress.ip_network(ip, strict=False)
 
         ovs.remove_evpn_network_ovs_flow(datapath_bridge,
                                          constants.OVS_VRF_RULE_COOKIE,
@@ -547,10 +552,7 @@ class OVNEVPNDriver(driver_api.AgentDriverBase):
 
         # Check if there are VMs on the network
         # and if so withdraw the routes
-        vms_on_net = linux_net.get_exposed_ips_on_network(
-            cr_lrp_info['lo'], net)
-        linux_net.delete_exposed_ips(vms_on_net,
-                                     cr_lrp_info['lo'])
+        linux_net.delete_exposed_ips_on_network(cr_lrp_info['lo'], net)
 
         try:
             del self.ovn_local_lrps[lrp_logical_port]
@@ -662,23 +664,21 @@ class OVNEVPNDriver(driver_api.AgentDriverBase):
 
         # add route for ip to ovs provider bridge (at the vrf routing table)
         for ip in ips:
-            ip_without_mask = ip.split("/")[0]
+            ip_without_mask = ip.partition('/')[0]
             if vlan_tag:
                 # ip route add GW_PORT_IP dev VLAN_DEVICE table VRF_TABLE_ID
                 linux_net.add_ip_route(
                     self._ovn_routing_tables_routes, ip_without_mask,
                     vni, vlan)
                 # add proxy ndp config for ipv6
-                if (linux_net.get_ip_version(ip_without_mask) ==
-                        constants.IP_VERSION_6):
+                if ':' in ip_without_mask:
                     linux_net.add_ndp_proxy(ip, vlan)
             else:
                 linux_net.add_ip_route(
                     self._ovn_routing_tables_routes, ip_without_mask,
                     vni, veth_vrf)
                 # add proxy ndp config for ipv6
-                if (linux_net.get_ip_version(ip_without_mask) ==
-                        constants.IP_VERSION_6):
+                if ':' in ip_without_mask:
                     linux_net.add_ndp_proxy(ip, datapath_bridge)
 
         # add unreachable route to vrf
@@ -698,7 +698,7 @@ class OVNEVPNDriver(driver_api.AgentDriverBase):
 
         if cleanup_ndp_proxy:
             for ip in ips:
-                if linux_net.get_ip_version(ip) == constants.IP_VERSION_6:
+                if ':' in ip:
                     linux_net.del_ndp_proxy(ip, datapath_bridge)
 
     def _remove_extra_vrfs(self):
@@ -800,14 +800,11 @@ class OVNEVPNDriver(driver_api.AgentDriverBase):
                                          constants.OVS_VRF_RULE_COOKIE)
                         nw_src_ip = nw_src_mask = None
                         matching_dst = False
-                        if flow_info.get('nw_src'):
-                            nw_src_ip = flow_info['nw_src'].split('/')[0]
-                            nw_src_mask = int(
-                                flow_info['nw_src'].split('/')[1])
-                        elif flow_info.get('ipv6_src'):
-                            nw_src_ip = flow_info['ipv6_src'].split('/')[0]
-                            nw_src_mask = int(
-                                flow_info['ipv6_src'].split('/')[1])
+                        nw_src = (flow_info.get('nw_src') or
+                                  flow_info.get('ipv6_src'))
+                        if nw_src:
+                            nw_src_ip, _, nw_src_mask = nw_src.partition('/')
+                            nw_src_mask = int(nw_src_mask)
 
                         for route_info in self._ovn_routing_tables_routes[
                                 dev]:
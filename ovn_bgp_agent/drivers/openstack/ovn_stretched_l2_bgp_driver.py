@@ -50,7 +50,7 @@ class OVNBGPStretchedL2Driver(driver_api.AgentDriverBase):
     def __init__(self):
         self.ovn_local_cr_lrps = {}
         self.vrf_routes = set()
-        self.ovn_routing_tables_routes = collections.defaultdict()
+        self.ovn_routing_tables_routes = collections.defaultdict(list)
         self.allowed_address_scopes = set(CONF.address_scopes or [])
         self.propagated_lrp_ports = {}
 
@@ -120,7 +120,7 @@ class OVNBGPStretchedL2Driver(driver_api.AgentDriverBase):
     @lockutils.synchronized("bgp")
     def sync(self):
         self.ovn_local_cr_lrps = {}
-        self.ovn_routing_tables_routes = collections.defaultdict()
+        self.ovn_routing_tables_routes = collections.defaultdict(list)
         self.vrf_routes = set()
         self.propagated_lrp_ports = {}
 
@@ -130,12 +130,13 @@ class OVNBGPStretchedL2Driver(driver_api.AgentDriverBase):
         vrf_routes = linux_net.get_routes_on_tables([CONF.bgp_vrf_table_id])
 
         for cr_lrp_port in self.sb_idl.get_cr_lrp_ports():
-            if (not cr_lrp_port.mac or
-                    len(cr_lrp_port.mac[0].strip().split(" ")) <= 1):
+            if not cr_lrp_port.mac:
+                continue
+            cr_lrp_ips = cr_lrp_port.mac[0].strip().split(" ")[1:]
+            if not cr_lrp_ips:
                 continue
 
-            self._expose_cr_lrp(cr_lrp_port.mac[0].strip().split(" ")[1:],
-                                cr_lrp_port)
+            self._expose_cr_lrp(cr_lrp_ips, cr_lrp_port)
 
         # remove all left over routes
         delete_routes = []
@@ -207,8 +208,10 @@ class OVNBGPStretchedL2Driver(driver_api.AgentDriverBase):
 
         return True
 
-    @lockutils.synchronized("bgp")
     def expose_subnet(self, ip, row):
+        # NOTE: the SB DB lookup is read-only and does not need to hold the
+        # lock, which is only taken to update the local state and routes.
+        # _ensure_network_exposed re-checks the gateway is still cached.
         try:
             cr_lrp = self.sb_idl.is_router_gateway_on_any_chassis(row.datapath)
         except agent_exc.DatapathNotFound:
@@ -218,9 +221,9 @@ class OVNBGPStretchedL2Driver(driver_api.AgentDriverBase):
         if not cr_lrp:
             return
 
-        self._ensure_network_exposed(row, cr_lrp.logical_port)
+        with lockutils.lock("bgp"):
+            self._ensure_network_exposed(row, cr_lrp.logical_port)
 
-    @lockutils.synchronized("bgp")
     def update_subnet(self, old, row):
         try:
             cr_lrp = self.sb_idl.is_router_gateway_on_any_chassis(row.datapath)
@@ -233,17 +236,15 @@ class OVNBGPStretchedL2Driver(driver_api.AgentDriverBase):
             return
 
         current_ips = row.mac[0].strip().split(" ")[1:]
-        previous_ips = (
-            old.mac[0].strip().split(" ")[1:]
-            if old.mac or len(old.mac[0].strip().split(" ")) > 1
-            else []
-        )
+        previous_ips = old.mac[0].strip().split(" ")[1:] if old.mac else []
         add_ips = list(
             filter(lambda ip: ip not in previous_ips, current_ips))
         delete_ips = list(
             filter(lambda ip: ip not in current_ips, previous_ips))
 
-        self._update_network(row, cr_lrp.logical_port, add_ips, delete_ips)
+        with lockutils.lock("bgp"):
+            self._update_network(
+                row, cr_lrp.logical_port, add_ips, delete_ips)
 
     @lockutils.synchronized("bgp")
     def withdraw_subnet(self, ip, row):
@@ -293,8 +294,7 @@ class OVNBGPStretchedL2Driver(driver_api.AgentDriverBase):
 
     @lockutils.synchronized('bgp')
     def withdraw_ip(self, ips, row, associated_port=None):
-        if not (row.type == constants.OVN_CHASSISREDIRECT_VIF_PORT_TYPE and
-                row.logical_port.startswith("cr-")):
+        if row.type != constants.OVN_CHASSISREDIRECT_VIF_PORT_TYPE:
             return
         self._withdraw_cr_lrp(ips, row)
 
@@ -323,8 +323,7 @@ class OVNBGPStretchedL2Driver(driver_api.AgentDriverBase):
 
     @lockutils.synchronized("bgp")
     def expose_ip(self, ips, row, associated_port=None):
-        if not (row.type == constants.OVN_CHASSISREDIRECT_VIF_PORT_TYPE and
-                row.logical_port.startswith("cr-")):
+        if row.type != constants.OVN_CHASSISREDIRECT_VIF_PORT_TYPE:
             return
         self._expose_cr_lrp(ips, row)
 
@@ -471,14 +470,14 @@ class OVNBGPStretchedL2Driver(driver_api.AgentDriverBase):
             # function can fix.
             return
         gateway_ips = gateway["ips"]
-        if (not router_port.mac or
-                len(router_port.mac[0].strip().split(" ")) <= 1):
+        if not router_port.mac:
+            return
+        router_port_ips = router_port.mac[0].strip().split(" ")[1:]
+        if not router_port_ips:
             return
 
         # get all ips from the router port
-        router_ips = [
-            ipaddress.ip_interface(ip)
-            for ip in router_port.mac[0].strip().split(" ")[1:]]
+        router_ips = [ipaddress.ip_interface(ip) for ip in router_port_ips]
 
         for router_ip in router_ips:
             if router_ip in gateway_ips:
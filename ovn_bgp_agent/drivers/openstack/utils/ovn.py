@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+
 import netaddr
 
 from oslo_config import cfg
@@ -33,6 +35,10 @@ from ovn_bgp_agent import exceptions
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
+PORT_BINDINGS_INDEX = collections.namedtuple(
+    'PortBindingsIndex', ['ports_by_datapath', 'port_by_name',
+                          'lrp_ports_by_datapath'])
+
 
 class OvnIdl(connection.OvsdbIdl):
     def __init__(self, driver, remote, schema, **kwargs):
@@ -508,6 +514,21 @@ class OvsdbSbOvnIdl(sb_impl_idl.OvnSbApiIdlImpl, Backend):
         super(OvsdbSbOvnIdl, self).__init__(connection)
         self.idl._session.reconnect.set_probe_interval(60000)
 
+    def autocreate_indices(self):
+        super(OvsdbSbOvnIdl, self).autocreate_indices()
+        # NOTE: most of the Port_Binding lookups are done per datapath (e.g.,
+        # get_ports_on_datapath, get_lrp_ports_for_router). With an index on
+        # that column, kept up to date by the IDL on every row change, they
+        # only visit the rows of the given datapath instead of the whole
+        # table. This relies on db_find_rows (DbFindCommand) looking the rows
+        # up through idlutils.index_condition_match, which ovsdbapp does
+        # since 1.5.0 (below the ovsdbapp>=1.16.0 in requirements.txt).
+        # Older versions would still scan the whole table
+        try:
+            self.create_index('Port_Binding', 'datapath')
+        except ValueError:
+            LOG.debug("Port_Binding datapath index already exists")
+
     def get_port_by_name(self, port):
         cmd = self.db_find_rows('Port_Binding', ('logical_port', '=', port))
         port_info = cmd.execute(check_error=True)
@@ -527,6 +548,32 @@ class OvsdbSbOvnIdl(sb_impl_idl.OvnSbApiIdlImpl, Backend):
             # Datapath has been removed.
             raise exceptions.DatapathNotFound(datapath=datapath)
 
+    def get_vm_ports_on_datapath(self, datapath):
+        # NOTE: a single (indexed) lookup of the ports on the datapath,
+        # filtering by type in the same pass instead of once per port type
+        return [row for row in self.get_ports_on_datapath(datapath)
+                if row.type in constants.OVN_VM_AND_VIRTUAL_VIF_PORT_TYPES]
+
+    def get_port_bindings_index(self):
+        """Index the Port_Binding table in a single pass
+
+        Returns a PORT_BINDINGS_INDEX with the rows grouped by datapath,
+        by logical_port name and, for the patch ports, by (router) datapath,
+        so that callers iterating over many ports (e.g., sync) do not need
+        to search the whole table once per port.
+        """
+        ports_by_datapath = collections.defaultdict(list)
+        port_by_name = {}
+        lrp_ports_by_datapath = collections.defaultdict(list)
+        rows = self.db_list_rows('Port_Binding').execute(check_error=True)
+        for row in rows:
+            ports_by_datapath[row.datapath].append(row)
+            port_by_name[row.logical_port] = row
+            if row.type == constants.OVN_PATCH_VIF_PORT_TYPE:
+                lrp_ports_by_datapath[row.datapath].append(row)
+        return PORT_BINDINGS_INDEX(ports_by_datapath, port_by_name,
+                                   lrp_ports_by_datapath)
+
     def get_ports_by_type(self, port_type):
         cmd = self.db_find_rows('Port_Binding',
                                 ('type', '=', port_type))
@@ -463,6 +463,13 @@ def unwire_provider_port(routing_tables_routes, port_ips, bridge_device,
         return _unwire_provider_port_ovn(ovn_idl, port_ips)
 
 
+def _get_ipv6_cidrs(cidrs):
+    # NOTE: a plain ':' check is enough to tell IPv6 addresses/cidrs apart,
+    # and avoids parsing every IP with netaddr on IPv4-only providers, where
+    # there is never an ndp proxy to handle
+    return [cidr for cidr in cidrs if ':' in cidr]
+
+
 def _ensure_updated_mac_tweak_flows(localnet, bridge_device, ovs_flows):
     ofport = ovs.get_ovs_patch_port_ofport(localnet)
     if ofport not in ovs_flows[bridge_device]['in_port']:
@@ -489,16 +496,15 @@ def _wire_provider_port_underlay(routing_tables_routes, ovs_flows, port_ips,
             else:
                 linux_net.add_ip_rule(ip, routing_table[bridge_device])
         except agent_exc.InvalidPortIP:
-            LOG.exception("Invalid IP to create a rule for port on the "
-                          "provider network: %s", ip)
+            LOG.warning("Invalid IP to create a rule for port on the "
+                        "provider network: %s", ip)
             return False
         linux_net.add_ip_route(routing_tables_routes, ip,
                                routing_table[bridge_device], bridge_device,
                                vlan=bridge_vlan)
     # add proxy ndp config for ipv6
-    for n_cidr in proxy_cidrs:
-        if linux_net.get_ip_version(n_cidr) == constants.IP_VERSION_6:
-            linux_net.add_ndp_proxy(n_cidr, bridge_device, bridge_vlan)
+    for n_cidr in _get_ipv6_cidrs(proxy_cidrs):
+        linux_net.add_ndp_proxy(n_cidr, bridge_device, bridge_vlan)
     # NOTE(ltomasbo): This is needed as the patch ports are not created
     # until the first VM/FIP in that provider network is created in a node
     try:
@@ -531,7 +537,7 @@ def _unwire_provider_port_underlay(routing_tables_routes, port_ips,
         return False
     for ip in port_ips:
         if lladdr:
-            if linux_net.get_ip_version(ip) == constants.IP_VERSION_6:
+            if ':' in ip:
                 cr_lrp_ip = '{}/128'.format(ip)
             else:
                 cr_lrp_ip = '{}/32'.format(ip)
@@ -542,22 +548,21 @@ def _unwire_provider_port_underlay(routing_tables_routes, port_ips,
                 linux_net.del_ip_rule(cr_lrp_ip, routing_table[bridge_device],
                                       dev=dev, lladdr=lladdr)
             except agent_exc.InvalidPortIP:
-                LOG.exception("Invalid IP to delete a rule for the "
-                              "provider port: %s", cr_lrp_ip)
+                LOG.warning("Invalid IP to delete a rule for the "
+                            "provider port: %s", cr_lrp_ip)
                 return False
         else:
             try:
                 linux_net.del_ip_rule(ip, routing_table[bridge_device])
             except agent_exc.InvalidPortIP:
-                LOG.exception("Invalid IP to delete a rule for the "
-                              "provider port: %s", ip)
+                LOG.warning("Invalid IP to delete a rule for the "
+                            "provider port: %s", ip)
                 return False
         linux_net.del_ip_route(routing_tables_routes, ip,
                                routing_table[bridge_device], bridge_device,
                                vlan=bridge_vlan)
-    for n_cidr in proxy_cidrs:
-        if linux_net.get_ip_version(n_cidr) == constants.IP_VERSION_6:
-            linux_net.del_ndp_proxy(n_cidr, bridge_device, bridge_vlan)
+    for n_cidr in _get_ipv6_cidrs(proxy_cidrs):
+        linux_net.del_ndp_proxy(n_cidr, bridge_device, bridge_vlan)
     return True
 
 
@@ -598,24 +603,26 @@ def _wire_lrp_port_underlay(routing_tables_routes, ip, bridge_device,
     try:
         linux_net.add_ip_rule(ip, routing_tables[bridge_device])
     except agent_exc.InvalidPortIP:
-        LOG.exception("Invalid IP to create a rule for the lrp (network "
-                      "router interface) port: %s", ip)
+        LOG.warning("Invalid IP to create a rule for the lrp (network "
+                    "router interface) port: %s", ip)
         return False
     LOG.debug("Added IP Rules for network %s", ip)
 
     LOG.debug("Adding IP Routes for network %s", ip)
     # NOTE(ltomasbo): This assumes the provider network can only have
     # (at most) 2 subnets, one for IPv4, one for IPv6
-    ip_version = linux_net.get_ip_version(ip)
+    ip_address, _, ip_mask = ip.partition('/')
+    is_ipv6 = ':' in ip_address
+    table = routing_tables[bridge_device]
     for cr_lrp_ip in cr_lrp_ips:
-        if linux_net.get_ip_version(cr_lrp_ip) == ip_version:
+        if (':' in cr_lrp_ip) == is_ipv6:
             linux_net.add_ip_route(
                 routing_tables_routes,
-                ip.split("/")[0],
-                routing_tables[bridge_device],
+                ip_address,
+                table,
                 bridge_device,
                 vlan=bridge_vlan,
-                mask=ip.split("/")[1],
+                mask=ip_mask,
                 via=cr_lrp_ip)
             break
     LOG.debug("Added IP Routes for network %s", ip)
@@ -641,22 +648,24 @@ def _unwire_lrp_port_underlay(routing_tables_routes, ip, bridge_device,
     try:
         linux_net.del_ip_rule(ip, routing_tables[bridge_device])
     except agent_exc.InvalidPortIP:
-        LOG.exception("Invalid IP to delete a rule for the "
-                      "lrp (network router interface) port: %s", ip)
+        LOG.warning("Invalid IP to delete a rule for the "
+                    "lrp (network router interface) port: %s", ip)
         return False
     LOG.debug("Deleted IP Rules for network %s", ip)
 
     LOG.debug("Deleting IP Routes for network %s", ip)
-    ip_version = linux_net.get_ip_version(ip)
+    ip_address, _, ip_mask = ip.partition('/')
+    is_ipv6 = ':' in ip_address
+    table = routing_tables[bridge_device]
     for cr_lrp_ip in cr_lrp_ips:
-        if linux_net.get_ip_version(cr_lrp_ip) == ip_version:
+        if (':' in cr_lrp_ip) == is_ipv6:
             linux_net.del_ip_route(
                 routing_tables_routes,
-                ip.split("/")[0],
-                routing_tables[bridge_device],
+                ip_address,
+                table,
                 bridge_device,
                 vlan=bridge_vlan,
-                mask=ip.split("/")[1],
+                mask=ip_mask,
                 via=cr_lrp_ip)
     LOG.debug("Deleted IP Routes for network %s", ip)
     return True
@@ -28,6 +28,7 @@ class Event(row_event.RowEvent):
         except Exception:
             LOG.exception("Unexpected exception while running the event "
                           "action")
+            self.agent.record_failure()
 
 
 class PortBindingChassisEvent(Event):
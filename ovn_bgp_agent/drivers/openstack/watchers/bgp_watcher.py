@@ -279,8 +279,7 @@ class TenantPortCreatedEvent(base_watcher.PortBindingChassisEvent):
             return False
 
     def _run(self, event, row, old):
-        if row.type not in (constants.OVN_VM_VIF_PORT_TYPE,
-                            constants.OVN_VIRTUAL_VIF_PORT_TYPE):
+        if row.type not in constants.OVN_VM_AND_VIRTUAL_VIF_PORT_TYPES:
             return
         with _SYNC_STATE_LOCK.read_lock():
             if row.mac == ['unknown']:
@@ -321,8 +320,7 @@ class TenantPortDeletedEvent(base_watcher.PortBindingChassisEvent):
             return False
 
     def _run(self, event, row, old):
-        if row.type not in (constants.OVN_VM_VIF_PORT_TYPE,
-                            constants.OVN_VIRTUAL_VIF_PORT_TYPE):
+        if row.type not in constants.OVN_VM_AND_VIRTUAL_VIF_PORT_TYPES:
             return
         if event == self.ROW_UPDATE:
             chassis = old.chassis
@@ -107,3 +107,12 @@ class InvalidArgument(RuntimeError):
     def __init__(self, message=None, device=None):
         message = message or self.message % {'device': device}
         super(InvalidArgument, self).__init__(message)
+
+
+class NetlinkBatchFailed(RuntimeError):
+    message = _("%(failed)s batched netlink requests failed: %(errors)s")
+
+    def __init__(self, message=None, failed=None, errors=None):
+        message = message or self.message % {'failed': failed,
+                                             'errors': errors}
+        super(NetlinkBatchFailed, self).__init__(message)
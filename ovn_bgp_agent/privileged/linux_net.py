@@ -12,9 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import contextlib
 import errno
 import ipaddress
 import os
+import threading
 
 import netaddr
 
@@ -38,6 +40,29 @@ LOG = logging.getLogger(__name__)
 
 NUD_STATES = {state[1]: state[0] for state in ndmsg.states.items()}
 
+# NOTE: netlink socket kept open by each (privsep) thread, see _get_iproute
+_iproute = threading.local()
+
+
+@contextlib.contextmanager
+def _get_iproute():
+    """Yield the IPRoute handle of the current thread
+
+    Creating (and closing) a netlink socket costs more than most of the
+    requests sent over it, so the same handle is reused across requests
+    instead. It is dropped, and a new one created on the next call, if the
+    socket fails.
+    """
+    ip = getattr(_iproute, 'handle', None)
+    if ip is None:
+        ip = _iproute.handle = iproute.IPRoute()
+    try:
+        yield ip
+    except (OSError, netlink_exceptions.NetlinkDumpInterrupted):
+        _iproute.handle = None
+        ip.close()
+        raise
+
 
 def get_scope_name(scope):
     """Return the name of the scope or the scope number if the name is unknown.
@@ -179,6 +204,79 @@ def delete_exposed_ips(ips, nic):
         delete_ip_address(ip_address, nic)
 
 
+@ovn_bgp_agent.privileged.default.entrypoint
+def netlink_batch(operations):
+    """Apply a set of netlink requests over a single IPRoute socket
+
+    This avoids paying the privsep round trip and the netlink socket
+    creation per request when many of them need to be applied at once,
+    e.g., during a resync.
+
+    The requests are independent of each other (they usually belong to
+    different ports), so a failing one is logged and the rest of them are
+    still applied.
+
+    :param operations: list of (object, command, kwargs) tuples, where the
+                       object is one of 'addr', 'rule', 'route' or 'neigh'.
+                       The kwargs for 'addr' and 'neigh' also include the
+                       'device' they apply to
+    :return: list of (object, command, error) tuples for the failed requests
+    """
+    link_ids = {}
+    errors = []
+    with _get_iproute() as ip:
+        for obj, command, kwargs in operations:
+            device = kwargs.pop('device', None)
+            try:
+                if device and device not in link_ids:
+                    link_id = ip.link_lookup(ifname=device)
+                    link_ids[device] = link_id[0] if link_id else None
+                _netlink_batch_request(ip, obj, command, kwargs, device,
+                                       link_ids.get(device))
+            except (agent_exc.NetworkInterfaceNotFound,
+                    netlink_exceptions.NetlinkError) as e:
+                LOG.error("Unable to %s %s %s on dev %s: %s", command, obj,
+                          kwargs, device, e)
+                errors.append((obj, command, str(e)))
+    return errors
+
+
+def _netlink_batch_request(ip, obj, command, kwargs, device, link_id):
+    try:
+        if obj == 'addr':
+            if not link_id:
+                raise agent_exc.NetworkInterfaceNotFound(device=device)
+            ip.addr(command, index=link_id, **kwargs)
+        elif obj == 'neigh':
+            if not link_id:
+                LOG.debug("No need to %s nei for dev %s as it does not "
+                          "exists", command, device)
+                return
+            ip.neigh(command, ifindex=link_id, **kwargs)
+        elif obj == 'rule':
+            ip.rule(command, **kwargs)
+        elif obj == 'route':
+            scope = kwargs.pop('scope', 'link')
+            kwargs['scope'] = get_scope_name(scope)
+            if 'family' not in kwargs:
+                kwargs['family'] = constants.AF_INET
+            ip.route(command, **kwargs)
+    except netlink_exceptions.NetlinkError as e:
+        try:
+            if obj == 'addr':
+                _translate_ip_addr_exception(
+                    e, ip=kwargs['address'], device=device)
+            elif obj == 'rule':
+                _translate_ip_rule_exception(e, kwargs)
+            elif obj == 'route':
+                _translate_ip_route_exception(e, kwargs)
+            else:
+                raise
+        except agent_exc.IpAddressAlreadyExists:
+            LOG.debug("IP %s already added on dev %s", kwargs['address'],
+                      device)
+
+
 @ovn_bgp_agent.privileged.default.entrypoint
 def rule_create(rule):
     _run_iproute_rule('add', **rule)
@@ -410,7 +508,7 @@ def make_serializable(value):
 
 
 def _get_link_id(ifname, raise_exception=True):
-    with iproute.IPRoute() as ip:
+    with _get_iproute() as ip:
         link_id = ip.link_lookup(ifname=ifname)
     if not link_id or len(link_id) < 1:
         if raise_exception:
@@ -468,7 +566,7 @@ def get_link_devices(**kwargs):
     """
     index = kwargs.pop('index') if 'index' in kwargs else 'all'
     try:
-        with iproute.IPRoute() as ip:
+        with _get_iproute() as ip:
             return make_serializable(ip.get_links(index, **kwargs))
     except OSError:
         raise
@@ -476,7 +574,7 @@ def get_link_devices(**kwargs):
 
 def _run_iproute_link(command, ifname, **kwargs):
     try:
-        with iproute.IPRoute() as ip:
+        with _get_iproute() as ip:
             idx = _get_link_id(ifname)
             return ip.link(command, index=idx, **kwargs)
     except netlink_exceptions.NetlinkError as e:
@@ -485,7 +583,7 @@ def _run_iproute_link(command, ifname, **kwargs):
 
 def _run_iproute_addr(command, device, **kwargs):
     try:
-        with iproute.IPRoute() as ip:
+        with _get_iproute() as ip:
             idx = _get_link_id(device)
             return ip.addr(command, index=idx, **kwargs)
     except netlink_exceptions.NetlinkError as e:
@@ -494,7 +592,7 @@ def _run_iproute_addr(command, device, **kwargs):
 
 def _run_iproute_route(command, **kwargs):
     try:
-        with iproute.IPRoute() as ip:
+        with _get_iproute() as ip:
             ip.route(command, **kwargs)
     except netlink_exceptions.NetlinkError as e:
         _translate_ip_route_exception(e, kwargs)
@@ -502,7 +600,7 @@ def _run_iproute_route(command, **kwargs):
 
 def _run_iproute_rule(command, **kwargs):
     try:
-        with iproute.IPRoute() as ip:
+        with _get_iproute() as ip:
             ip.rule(command, **kwargs)
     except netlink_exceptions.NetlinkError as e:
         _translate_ip_rule_exception(e, kwargs)
@@ -510,7 +608,7 @@ def _run_iproute_rule(command, **kwargs):
 
 def _run_iproute_neigh(command, device, **kwargs):
     try:
-        with iproute.IPRoute() as ip:
+        with _get_iproute() as ip:
             idx = _get_link_id(device)
             return ip.neigh(command, ifindex=idx, **kwargs)
     except agent_exc.NetworkInterfaceNotFound:
@@ -522,7 +620,7 @@ def _run_iproute_neigh(command, device, **kwargs):
 def create_interface(ifname, kind, **kwargs):
     ifname = ifname[:15]
     try:
-        with iproute.IPRoute() as ip:
+        with _get_iproute() as ip:
             physical_interface = kwargs.pop('physical_interface', None)
             if physical_interface:
                 link_key = 'vxlan_link' if kind == 'vxlan' else 'link'
@@ -576,7 +674,7 @@ def get_ip_addresses(**kwargs):
 
     :return: (tuple) IP addresses in a namespace
     """
-    with iproute.IPRoute() as ip:
+    with _get_iproute() as ip:
         return make_serializable(ip.get_addr(**kwargs))
 
 
@@ -594,13 +692,13 @@ def list_ip_routes(ip_version, device=None, table=None, **kwargs):
         kwargs['oif'] = _get_link_id(device)
     if table:
         kwargs['table'] = int(table)
-    with iproute.IPRoute() as ip:
+    with _get_iproute() as ip:
         return make_serializable(ip.route('show', **kwargs))
 
 
 @ovn_bgp_agent.privileged.default.entrypoint
 def list_ip_rules(ip_version, **kwargs):
     """List all IP rules"""
-    with iproute.IPRoute() as ip:
+    with _get_iproute() as ip:
         return make_serializable(ip.get_rules(
             family=common_utils.IP_VERSION_FAMILY_MAP[ip_version], **kwargs))
@@ -551,13 +551,11 @@ class TestNBOVNBGPDriver(test_base.TestCase):
 
         self._test_expose_ip(ips, ips_info)
 
-    @mock.patch.object(linux_net, 'get_ip_version')
-    def _test_withdraw_ip(self, ips, ips_info, provider, mock_ip_version):
+    def _test_withdraw_ip(self, ips, ips_info, provider):
         mock_withdraw_provider_port = mock.patch.object(
             self.nb_bgp_driver, '_withdraw_provider_port').start()
         mock_get_ls_localnet_info = mock.patch.object(
             self.nb_bgp_driver, '_get_ls_localnet_info').start()
-        mock_ip_version.return_value = constants.IP_VERSION_6
         self.nb_idl.ls_has_virtual_ports.return_value = False
         self.nb_idl.get_active_lsp_on_chassis.return_value = False
         if provider:
@@ -643,7 +641,7 @@ class TestNBOVNBGPDriver(test_base.TestCase):
         ips = [self.ipv4, self.ipv6]
         ips_info = {
             'mac': 'fake-mac',
-            'cidrs': ['test-cidr'],
+            'cidrs': ['2002::/64'],
             'type': constants.OVN_VIRTUAL_VIF_PORT_TYPE,
             'logical_switch': 'test-ls'
         }
@@ -665,7 +663,7 @@ class TestNBOVNBGPDriver(test_base.TestCase):
         ips = [self.ipv4, self.ipv6]
         ips_info = {
             'mac': 'fake-mac',
-            'cidrs': ['test-cidr'],
+            'cidrs': ['2002::/64'],
             'type': constants.OVN_CR_LRP_PORT_TYPE,
             'logical_switch': 'test-ls',
             'router': 'router1'
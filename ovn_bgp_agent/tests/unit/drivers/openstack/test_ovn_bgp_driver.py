@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import ipaddress
 from unittest import mock
 
 from oslo_config import cfg
@@ -63,6 +64,8 @@ class TestOVNBGPDriver(test_base.TestCase):
             self.cr_lrp0: {'provider_datapath': 'fake-provider-dp',
                            'router_datapath': 'fake-router-dp',
                            'ips': [self.fip],
+                           'ips_without_mask': [self.fip],
+                           'ip_versions': {constants.IP_VERSION_4},
                            'subnets_datapath': {self.lrp0: 'fake-lrp-dp'},
                            'subnets_cidr': ['192.168.1.1/24'],
                            'provider_ovn_lbs': [],
@@ -125,7 +128,8 @@ class TestOVNBGPDriver(test_base.TestCase):
             'net0:bridge0', 'net1:bridge1']
         self.sb_idl.get_network_vlan_tag_by_network_name.side_effect = (
             [10], [11])
-        fake_ip_rules = 'fake-ip-rules'
+        fake_ip_rules = {'{}/32'.format(self.ipv4): {
+            'table': 200, 'family': constants.AF_INET}}
         mock_get_ip_rules.return_value = fake_ip_rules
         ips = [self.ipv4, self.ipv6]
         mock_exposed_ips.return_value = ips
@@ -138,7 +142,7 @@ class TestOVNBGPDriver(test_base.TestCase):
             self.bgp_driver, '_ensure_port_exposed').start()
         mock_ensure_cr_port_exposed = mock.patch.object(
             self.bgp_driver, '_ensure_cr_lrp_associated_ports_exposed').start()
-        mock_routing_bridge.return_value = ['fake-route']
+        mock_routing_bridge.return_value = []
         mock_nic_address.return_value = self.mac
         mock_get_patch_ports.return_value = [1, 2]
 
@@ -168,24 +172,188 @@ class TestOVNBGPDriver(test_base.TestCase):
             mock.call(mock.ANY, 'bridge1', constants.OVS_RULE_COOKIE)]
         mock_remove_flows.assert_has_calls(expected_calls)
 
-        expected_calls = [mock.call('fake-port0', ips, fake_ip_rules),
-                          mock.call('fake-port1', ips, fake_ip_rules)]
+        expected_calls = [
+            mock.call('fake-port0', set(ips), fake_ip_rules),
+            mock.call('fake-port1', set(ips), fake_ip_rules)]
         mock_ensure_port_exposed.assert_has_calls(expected_calls)
 
-        expected_calls = [mock.call('fake-cr-port0', ips, fake_ip_rules),
-                          mock.call('fake-cr-port1', ips, fake_ip_rules)]
+        expected_calls = [
+            mock.call('fake-cr-port0', set(ips), fake_ip_rules),
+            mock.call('fake-cr-port1', set(ips), fake_ip_rules)]
         mock_ensure_cr_port_exposed.assert_has_calls(expected_calls)
 
         mock_del_exposed_ips.assert_called_once_with(
-            ips, CONF.bgp_nic)
+            set(ips), CONF.bgp_nic)
         mock_del_ip_rules.assert_called_once_with(fake_ip_rules)
         mock_del_ip_routes.assert_called_once_with(
             {}, mock.ANY,
-            {'bridge0': ['fake-route'], 'bridge1': ['fake-route']})
+            {'bridge0': [], 'bridge1': []})
 
+        # the host is only dumped once
+        mock_exposed_ips.assert_called_once_with(CONF.bgp_nic)
         mock_get_ip_rules.assert_called_once_with(mock.ANY)
         mock_vlan_leftovers.assert_called_once_with(
             self.sb_idl, self.bgp_driver.ovn_bridge_mappings)
+        # nothing was exposed and the leftovers were deleted
+        self.assertEqual(
+            (self.sb_idl.idl.change_seqno, ['net0:bridge0', 'net1:bridge1'],
+             0, (set(), set(), set())),
+            self.bgp_driver._last_sync_state)
+
+    @mock.patch.object(wire_utils, 'delete_vlan_devices_leftovers')
+    @mock.patch.object(linux_net, 'delete_bridge_ip_routes')
+    @mock.patch.object(linux_net, 'delete_ip_rules')
+    @mock.patch.object(linux_net, 'delete_exposed_ips')
+    @mock.patch.object(ovs, 'remove_extra_ovs_flows')
+    @mock.patch.object(ovs, 'ensure_mac_tweak_flows')
+    @mock.patch.object(ovs, 'get_ovs_patch_ports_info')
+    @mock.patch.object(linux_net, 'get_ovn_ip_rules')
+    @mock.patch.object(linux_net, 'get_exposed_ips')
+    @mock.patch.object(linux_net, 'get_interface_address')
+    @mock.patch.object(linux_net, 'ensure_vlan_device_for_network')
+    @mock.patch.object(linux_net, 'ensure_routing_table_for_bridge')
+    @mock.patch.object(linux_net, 'ensure_arp_ndp_enabled_for_bridge')
+    def test_sync_unchanged(
+            self, mock_ensure_arp, mock_routing_bridge,
+            mock_ensure_vlan_network, mock_nic_address, mock_exposed_ips,
+            mock_get_ip_rules, mock_get_patch_ports, mock_ensure_mac,
+            mock_remove_flows, mock_del_exposed_ips, mock_del_ip_rules,
+            mock_del_ip_routes, mock_vlan_leftovers):
+        mock_sync_ports = mock.patch.object(
+            self.bgp_driver, '_ensure_port_exposed').start()
+        self.mock_ovs_idl.get_ovn_bridge_mappings.return_value = [
+            'net0:bridge0']
+        self.sb_idl.get_network_vlan_tag_by_network_name.return_value = []
+        self.sb_idl.idl.change_seqno = 5
+        mock_exposed_ips.return_value = [self.ipv4]
+        mock_get_ip_rules.return_value = {}
+        mock_routing_bridge.return_value = []
+        self.bgp_driver._last_sync_state = (
+            5, ['net0:bridge0'], 0, ({self.ipv4}, set(), set()))
+
+        self.bgp_driver.sync()
+
+        # the ports sync is skipped
+        mock_sync_ports.assert_not_called()
+        self.sb_idl.get_ports_on_chassis.assert_not_called()
+        mock_del_exposed_ips.assert_not_called()
+        mock_del_ip_rules.assert_not_called()
+        # but the host side is still ensured
+        mock_routing_bridge.assert_called_once_with(
+            {}, 'bridge0', CONF.bgp_vrf_table_id)
+        mock_ensure_arp.assert_called_once_with('bridge0', 1, [])
+        mock_ensure_mac.assert_called_once_with(
+            'bridge0', mock.ANY, mock.ANY, constants.OVS_RULE_COOKIE)
+        mock_remove_flows.assert_called_once_with(
+            mock.ANY, 'bridge0', constants.OVS_RULE_COOKIE)
+        mock_del_ip_routes.assert_called_once_with(
+            {}, mock.ANY, {'bridge0': []})
+        mock_vlan_leftovers.assert_called_once_with(
+            self.sb_idl, self.bgp_driver.ovn_bridge_mappings)
+        mock_exposed_ips.assert_called_once_with(CONF.bgp_nic)
+        self.assertEqual(
+            (5, ['net0:bridge0'], 0, ({self.ipv4}, set(), set())),
+            self.bgp_driver._last_sync_state)
+
+    @mock.patch.object(linux_net, 'delete_bridge_ip_routes')
+    @mock.patch.object(linux_net, 'ensure_routing_table_for_bridge')
+    @mock.patch.object(linux_net, 'get_ovn_ip_rules')
+    @mock.patch.object(linux_net, 'get_exposed_ips')
+    def test_sync_changed(self, mock_exposed_ips, mock_get_ip_rules,
+                          mock_routing_bridge, mock_del_ip_routes):
+        mock_sync_ports = mock.patch.object(
+            self.bgp_driver, '_sync_ports').start()
+        mock.patch.object(self.bgp_driver, '_get_synced_host_state',
+                          return_value=(set(), set(), set())).start()
+        mock.patch.object(wire_utils, 'delete_vlan_devices_leftovers').start()
+        self.mock_ovs_idl.get_ovn_bridge_mappings.return_value = []
+        self.sb_idl.idl.change_seqno = 5
+        mock_exposed_ips.return_value = [self.ipv4]
+        mock_get_ip_rules.return_value = {}
+        last_sync_state = (5, [], 0, ({self.ipv4}, set(), set()))
+
+        # nothing synced yet
+        self.bgp_driver.sync()
+        # the SB DB changed
+        self.bgp_driver._last_sync_state = last_sync_state
+        self.sb_idl.idl.change_seqno = 6
+        self.bgp_driver.sync()
+        # something failed since the last sync
+        self.bgp_driver._last_sync_state = last_sync_state
+        self.sb_idl.idl.change_seqno = 5
+        self.bgp_driver.record_failure()
+        self.bgp_driver.sync()
+        # an exposed IP was removed from the host
+        self.bgp_driver._last_sync_state = (
+            5, [], 1, ({self.ipv4}, set(), set()))
+        mock_exposed_ips.return_value = []
+        self.bgp_driver.sync()
+
+        self.assertEqual(4, mock_sync_ports.call_count)
+
+    @mock.patch.object(linux_net, 'delete_ip_rules')
+    @mock.patch.object(linux_net, 'delete_exposed_ips')
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    def test__get_synced_host_state(self, mock_netlink_batch,
+                                    mock_del_exposed_ips, mock_del_ip_rules):
+        mock_netlink_batch.return_value = [('addr', 'add', 'fake-error')]
+        self.bgp_driver.ovn_routing_tables = {'bridge0': 200}
+        self.bgp_driver.ovn_local_cr_lrps = {}
+        self.sb_idl.get_ports_on_chassis.return_value = ['fake-port']
+        self.sb_idl.get_cr_lrp_ports_on_chassis.return_value = []
+        exposed_ips = {self.ipv4, self.fip}
+        ovn_ip_rules = {
+            '{}/32'.format(self.ipv4): {'table': 200,
+                                        'family': constants.AF_INET},
+            '{}/32'.format(self.fip): {'table': 200,
+                                       'family': constants.AF_INET}}
+
+        def _ensure_port_exposed(port, exposed_ips, ovn_ip_rules):
+            exposed_ips.discard(self.ipv4)
+            ovn_ip_rules.pop('{}/32'.format(self.ipv4))
+            batch = linux_net._get_netlink_batch()
+            batch.add('addr', 'add', device=CONF.bgp_nic,
+                      address=self.ipv6, mask=128, family=constants.AF_INET6)
+            batch.add('route', 'replace', dst=self.ipv6, dst_len=128,
+                      oif=3, table=200, family=constants.AF_INET6)
+        mock.patch.object(self.bgp_driver, '_ensure_port_exposed',
+                          side_effect=_ensure_port_exposed).start()
+        route = mock.Mock(get_attr={'RTA_DST': self.ipv4,
+                                    'RTA_OIF': 3}.get)
+        route.__getitem__ = mock.Mock(return_value=32)
+        host_state = self.bgp_driver._get_host_sync_state(
+            exposed_ips, ovn_ip_rules, {'bridge0': [route]})
+
+        batch = self.bgp_driver._sync_ports(exposed_ips, ovn_ip_rules)
+
+        # the IPs and rules left are deleted, instead of dumping the host
+        # again its state is built from the batch requests
+        mock_del_exposed_ips.assert_called_once_with({self.fip}, CONF.bgp_nic)
+        self.assertEqual(
+            ({self.ipv4, self.ipv6}, {(self.ipv4, 32, 200)},
+             {(200, self.ipv4, 32, None, 3), (200, self.ipv6, 128, None, 3)}),
+            self.bgp_driver._get_synced_host_state(
+                host_state, batch, exposed_ips, ovn_ip_rules))
+        # and the failed requests are retried by the next sync
+        self.assertEqual(1, self.bgp_driver._failures)
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    @mock.patch.object(wire_utils, 'wire_lrp_port')
+    def test__expose_lrp_port_batch_errors(self, mock_wire,
+                                           mock_netlink_batch):
+        def _wire_lrp_port(*args):
+            linux_net._get_netlink_batch().add(
+                'rule', 'add', dst=self.ipv4, table=7, dst_len=32,
+                family=constants.AF_INET)
+            return True
+        mock_wire.side_effect = _wire_lrp_port
+        mock_netlink_batch.return_value = [('rule', 'add', 'fake-error')]
+        self.sb_idl.get_ports_on_datapath.return_value = []
+
+        self.bgp_driver._expose_lrp_port(
+            '{}/32'.format(self.ipv4), self.lrp0, self.cr_lrp0, 'fake-lrp-dp')
+
+        self.assertEqual(1, self.bgp_driver._failures)
 
     @mock.patch.object(linux_net, 'get_ip_version')
     def test__ensure_cr_lrp_associated_ports_exposed(self, mock_ip_version):
@@ -197,8 +365,8 @@ class TestOVNBGPDriver(test_base.TestCase):
         self.sb_idl.get_cr_lrp_nat_addresses_info.return_value = (
             [self.ipv4, self.ipv6], patch_port_row)
 
-        exposed_ips = [self.ipv4, '192.168.1.20']
-        mock_expose_ip.return_value = exposed_ips
+        exposed_ips = {self.ipv4, '192.168.1.20'}
+        mock_expose_ip.return_value = [self.ipv4, '192.168.1.20']
         ip_rules = {"{}/128".format(self.ipv6): 'fake-rules'}
         self.bgp_driver._ensure_cr_lrp_associated_ports_exposed(
             'fake-cr-lrp', exposed_ips, ip_rules)
@@ -206,7 +374,7 @@ class TestOVNBGPDriver(test_base.TestCase):
         mock_expose_ip.assert_called_once_with(
             [self.ipv4, self.ipv6], patch_port_row,
             associated_port='fake-cr-lrp')
-        self.assertEqual(['192.168.1.20'], exposed_ips)
+        self.assertEqual(set(), exposed_ips)
 
     def test__ensure_port_exposed(self):
         mock_expose_ip = mock.patch.object(
@@ -217,13 +385,15 @@ class TestOVNBGPDriver(test_base.TestCase):
             'type': '',
             'mac': ['{} {} {}'.format(self.mac, self.ipv4, self.ipv6)]})
 
-        exposed_ips = [self.ipv4, self.ipv6]
+        exposed_ips = {self.ipv4, self.ipv6}
         ip_rules = {"{}/128".format(self.ipv6): 'fake-rules'}
-        self.bgp_driver._ensure_port_exposed(port, exposed_ips, ip_rules)
+        ret = self.bgp_driver._ensure_port_exposed(port, exposed_ips,
+                                                   ip_rules)
 
+        self.assertEqual([self.ipv4, self.ipv6], ret)
         mock_expose_ip.assert_called_once_with(
             [self.ipv4, self.ipv6], port)
-        self.assertEqual([], exposed_ips)
+        self.assertEqual(set(), exposed_ips)
         self.assertEqual({}, ip_rules)
 
     def test__ensure_port_exposed_fip(self):
@@ -236,13 +406,13 @@ class TestOVNBGPDriver(test_base.TestCase):
             'type': '',
             'mac': ['{} {} {}'.format(self.mac, self.ipv4, self.ipv6)]})
 
-        exposed_ips = [self.ipv4, fip]
+        exposed_ips = {self.ipv4, fip}
         ip_rules = {"{}/128".format(self.ipv6): 'fake-rules'}
         self.bgp_driver._ensure_port_exposed(port, exposed_ips, ip_rules)
 
         mock_expose_ip.assert_called_once_with(
             [self.ipv4, self.ipv6], port)
-        self.assertEqual([self.ipv4], exposed_ips)
+        self.assertEqual({self.ipv4}, exposed_ips)
         self.assertEqual({"{}/128".format(self.ipv6): 'fake-rules'}, ip_rules)
 
     def test__ensure_port_exposed_fip_unknown_mac(self):
@@ -256,16 +426,31 @@ class TestOVNBGPDriver(test_base.TestCase):
             'mac': ['unknown'],
             'datapath': 'fake-dp'})
 
-        exposed_ips = [self.ipv4, fip]
+        exposed_ips = {self.ipv4, fip}
         ip_rules = {"{}/128".format(self.ipv6): 'fake-rules'}
         self.sb_idl.is_provider_network.return_value = False
 
         self.bgp_driver._ensure_port_exposed(port, exposed_ips, ip_rules)
 
         mock_expose_ip.assert_called_once_with([], port)
-        self.assertEqual([self.ipv4], exposed_ips)
+        self.assertEqual({self.ipv4}, exposed_ips)
         self.assertEqual({"{}/128".format(self.ipv6): 'fake-rules'}, ip_rules)
 
+    def test__ensure_port_exposed_unknown_mac_provider_network(self):
+        mock_expose_ip = mock.patch.object(
+            self.bgp_driver, '_expose_ip').start()
+        port = fakes.create_object({
+            'name': 'fake-port',
+            'type': '',
+            'mac': ['unknown'],
+            'datapath': 'fake-dp'})
+        self.sb_idl.is_provider_network.return_value = True
+
+        ret = self.bgp_driver._ensure_port_exposed(port)
+
+        self.assertEqual([], ret)
+        mock_expose_ip.assert_not_called()
+
     def test__ensure_port_exposed_wrong_port_type(self):
         mock_expose_ip = mock.patch.object(
             self.bgp_driver, '_expose_ip').start()
@@ -370,7 +555,7 @@ class TestOVNBGPDriver(test_base.TestCase):
 
     @mock.patch.object(linux_net, 'add_ips_to_dev')
     @mock.patch.object(linux_net, 'get_ip_version')
-    def test__expose_tenant_port(self, mock_ip_version, mock_add_ips_dev):
+    def test__expose_tenant_ports(self, mock_ip_version, mock_add_ips_dev):
         tenant_port = fakes.create_object({
             'name': 'fake-port',
             'type': constants.OVN_VM_VIF_PORT_TYPE,
@@ -381,16 +566,45 @@ class TestOVNBGPDriver(test_base.TestCase):
 
         mock_ip_version.return_value = constants.IP_VERSION_4
 
-        self.bgp_driver._expose_tenant_port(tenant_port, ip_version)
+        self.bgp_driver._expose_tenant_ports([tenant_port], ip_version)
+
+        mock_add_ips_dev.assert_called_once_with(
+            CONF.bgp_nic, ['192.168.1.10', '192.168.1.11'])
+
+    @mock.patch.object(linux_net, 'add_ips_to_dev')
+    def test__expose_tenant_ports_exposed_ips_and_rules(
+            self, mock_add_ips_dev):
+        tenant_port = fakes.create_object({
+            'name': 'fake-port',
+            'type': constants.OVN_VM_VIF_PORT_TYPE,
+            'mac': ['aa:bb:cc:dd:ee:ee 192.168.1.10 192.168.1.11'],
+            'chassis': 'fake-chassis1',
+            'external_ids': {}})
+        ovn_lb_port = fakes.create_object({
+            'name': 'fake-lb-port',
+            'type': constants.OVN_VM_VIF_PORT_TYPE,
+            'mac': [],
+            'chassis': '',
+            'external_ids': {'neutron:cidrs': '192.168.1.12/24'},
+            'up': [False]})
+        exposed_ips = {'192.168.1.10', '192.168.1.12', '192.168.1.20'}
+        ovn_ip_rules = {'192.168.1.10/32': 'fake-rule',
+                        '192.168.1.12/24': 'fake-rule',
+                        '192.168.1.20/32': 'fake-rule'}
+
+        self.bgp_driver._expose_tenant_ports(
+            [tenant_port, ovn_lb_port], constants.IP_VERSION_4,
+            exposed_ips=exposed_ips, ovn_ip_rules=ovn_ip_rules)
 
-        expected_calls = [mock.call(CONF.bgp_nic, ['192.168.1.10']),
-                          mock.call(CONF.bgp_nic, ['192.168.1.11'])]
-        mock_add_ips_dev.assert_has_calls(expected_calls)
+        mock_add_ips_dev.assert_called_once_with(
+            CONF.bgp_nic, ['192.168.1.10', '192.168.1.11', '192.168.1.12'])
+        self.assertEqual({'192.168.1.20'}, exposed_ips)
+        self.assertEqual({'192.168.1.20/32': 'fake-rule'}, ovn_ip_rules)
 
     @mock.patch.object(linux_net, 'add_ips_to_dev')
     @mock.patch.object(linux_net, 'get_ip_version')
-    def test__expose_tenant_port_ovn_lb(self, mock_ip_version,
-                                        mock_add_ips_dev):
+    def test__expose_tenant_ports_ovn_lb(self, mock_ip_version,
+                                         mock_add_ips_dev):
         tenant_port = fakes.create_object({
             'name': 'fake-port',
             'type': constants.OVN_VM_VIF_PORT_TYPE,
@@ -402,15 +616,15 @@ class TestOVNBGPDriver(test_base.TestCase):
 
         mock_ip_version.return_value = constants.IP_VERSION_4
 
-        self.bgp_driver._expose_tenant_port(tenant_port, ip_version)
+        self.bgp_driver._expose_tenant_ports([tenant_port], ip_version)
 
         mock_add_ips_dev.assert_called_once_with(CONF.bgp_nic,
                                                  ['192.168.1.10'])
 
     @mock.patch.object(linux_net, 'add_ips_to_dev')
     @mock.patch.object(linux_net, 'get_ip_version')
-    def test__expose_tenant_port_no_ip(self, mock_ip_version,
-                                       mock_add_ips_dev):
+    def test__expose_tenant_ports_no_ip(self, mock_ip_version,
+                                        mock_add_ips_dev):
         tenant_port = fakes.create_object({
             'name': 'fake-port',
             'type': constants.OVN_VM_VIF_PORT_TYPE,
@@ -421,15 +635,15 @@ class TestOVNBGPDriver(test_base.TestCase):
 
         mock_ip_version.return_value = constants.IP_VERSION_4
 
-        self.bgp_driver._expose_tenant_port(tenant_port, ip_version)
+        self.bgp_driver._expose_tenant_ports([tenant_port], ip_version)
 
         mock_ip_version.assert_not_called()
         mock_add_ips_dev.assert_not_called()
 
     @mock.patch.object(linux_net, 'add_ips_to_dev')
     @mock.patch.object(linux_net, 'get_ip_version')
-    def test__expose_tenant_port_no_mac(self, mock_ip_version,
-                                        mock_add_ips_dev):
+    def test__expose_tenant_ports_no_mac(self, mock_ip_version,
+                                         mock_add_ips_dev):
         tenant_port = fakes.create_object({
             'name': 'fake-port',
             'type': constants.OVN_VM_VIF_PORT_TYPE,
@@ -440,15 +654,15 @@ class TestOVNBGPDriver(test_base.TestCase):
 
         mock_ip_version.return_value = constants.IP_VERSION_4
 
-        self.bgp_driver._expose_tenant_port(tenant_port, ip_version)
+        self.bgp_driver._expose_tenant_ports([tenant_port], ip_version)
 
         mock_ip_version.assert_not_called()
         mock_add_ips_dev.assert_not_called()
 
     @mock.patch.object(linux_net, 'add_ips_to_dev')
     @mock.patch.object(linux_net, 'get_ip_version')
-    def test__expose_tenant_port_unknown_mac(self, mock_ip_version,
-                                             mock_add_ips_dev):
+    def test__expose_tenant_ports_unknown_mac(self, mock_ip_version,
+                                              mock_add_ips_dev):
         tenant_port = fakes.create_object({
             'name': 'fake-port',
             'type': constants.OVN_VM_VIF_PORT_TYPE,
@@ -460,15 +674,15 @@ class TestOVNBGPDriver(test_base.TestCase):
 
         mock_ip_version.return_value = constants.IP_VERSION_4
 
-        self.bgp_driver._expose_tenant_port(tenant_port, ip_version)
+        self.bgp_driver._expose_tenant_ports([tenant_port], ip_version)
 
         mock_add_ips_dev.assert_called_once_with(CONF.bgp_nic,
                                                  ['192.168.1.10'])
 
     @mock.patch.object(linux_net, 'add_ips_to_dev')
     @mock.patch.object(linux_net, 'get_ip_version')
-    def test__expose_tenant_port_wrong_type(self, mock_ip_version,
-                                            mock_add_ips_dev):
+    def test__expose_tenant_ports_wrong_type(self, mock_ip_version,
+                                             mock_add_ips_dev):
         tenant_port = fakes.create_object({
             'name': 'fake-port',
             'type': constants.OVN_CHASSISREDIRECT_VIF_PORT_TYPE,
@@ -479,15 +693,15 @@ class TestOVNBGPDriver(test_base.TestCase):
 
         mock_ip_version.return_value = constants.IP_VERSION_4
 
-        self.bgp_driver._expose_tenant_port(tenant_port, ip_version)
+        self.bgp_driver._expose_tenant_ports([tenant_port], ip_version)
 
         mock_ip_version.assert_not_called()
         mock_add_ips_dev.assert_not_called()
 
     @mock.patch.object(linux_net, 'add_ips_to_dev')
     @mock.patch.object(linux_net, 'get_ip_version')
-    def test__expose_tenant_port_no_chassis(self, mock_ip_version,
-                                            mock_add_ips_dev):
+    def test__expose_tenant_ports_no_chassis(self, mock_ip_version,
+                                             mock_add_ips_dev):
         tenant_port = fakes.create_object({
             'name': 'fake-port',
             'type': constants.OVN_VM_VIF_PORT_TYPE,
@@ -498,7 +712,7 @@ class TestOVNBGPDriver(test_base.TestCase):
 
         mock_ip_version.return_value = constants.IP_VERSION_4
 
-        self.bgp_driver._expose_tenant_port(tenant_port, ip_version)
+        self.bgp_driver._expose_tenant_ports([tenant_port], ip_version)
 
         mock_ip_version.assert_not_called()
         mock_add_ips_dev.assert_not_called()
@@ -602,6 +816,10 @@ class TestOVNBGPDriver(test_base.TestCase):
         gateway = {}
         gateway['ips'] = ['{}/32'.format(self.fip),
                           '2003::1234:abcd:ffff:c0a8:102/128']
+        gateway['ips_without_mask'] = [self.fip,
+                                       '2003::1234:abcd:ffff:c0a8:102']
+        gateway['ip_versions'] = {constants.IP_VERSION_4,
+                                  constants.IP_VERSION_6}
         gateway['provider_datapath'] = 'bc6780f4-9510-4270-b4d2-b8d5c6802713'
         gateway['subnets_datapath'] = {}
         gateway['subnets_cidr'] = []
@@ -664,10 +882,34 @@ class TestOVNBGPDriver(test_base.TestCase):
         mock_add_route.assert_called_once_with(
             mock.ANY, self.ipv4, 'fake-table', self.bridge,
             vlan=10, mask='32', via=self.fip)
-        expected_calls = [mock.call(CONF.bgp_nic, ['192.168.1.10']),
-                          mock.call(CONF.bgp_nic, ['192.168.1.11']),
-                          mock.call(CONF.bgp_nic, ['192.168.1.13'])]
-        mock_add_ips_dev.assert_has_calls(expected_calls)
+        mock_add_ips_dev.assert_called_once_with(
+            CONF.bgp_nic, ['192.168.1.10', '192.168.1.11', '192.168.1.13'])
+
+    def test__process_lrp_port_port_bindings_index(self):
+        mock_expose_lrp = mock.patch.object(
+            self.bgp_driver, '_expose_lrp_port').start()
+        router_port = fakes.create_object({
+            'chassis': [],
+            'mac': ['{} {}/32'.format(self.mac, self.ipv4)],
+            'logical_port': 'lrp-fake-logical-port',
+            'options': {'peer': 'fake-peer'}})
+        peer_port = fakes.create_object({
+            'logical_port': 'fake-peer',
+            'datapath': 'fake-subnet-dp'})
+        port_bindings_index = ovn.PORT_BINDINGS_INDEX(
+            {}, {'fake-peer': peer_port}, {})
+
+        self.bgp_driver._process_lrp_port(
+            router_port, 'gateway_port', exposed_ips='fake-ips',
+            ovn_ip_rules='fake-rules',
+            port_bindings_index=port_bindings_index)
+
+        self.sb_idl.get_port_datapath.assert_not_called()
+        mock_expose_lrp.assert_called_once_with(
+            '{}/32'.format(self.ipv4), 'lrp-fake-logical-port',
+            'gateway_port', 'fake-subnet-dp', exposed_ips='fake-ips',
+            ovn_ip_rules='fake-rules',
+            port_bindings_index=port_bindings_index)
 
     @mock.patch.object(linux_net, 'add_ips_to_dev')
     @mock.patch.object(linux_net, 'add_ip_route')
@@ -687,6 +929,10 @@ class TestOVNBGPDriver(test_base.TestCase):
         gateway = {}
         gateway['ips'] = ['{}/32'.format(self.fip),
                           '2003::1234:abcd:ffff:c0a8:102/128']
+        gateway['ips_without_mask'] = [self.fip,
+                                       '2003::1234:abcd:ffff:c0a8:102']
+        gateway['ip_versions'] = {constants.IP_VERSION_4,
+                                  constants.IP_VERSION_6}
         gateway['provider_datapath'] = 'bc6780f4-9510-4270-b4d2-b8d5c6802713'
         gateway['subnets_datapath'] = {}
         gateway['subnets_cidr'] = []
@@ -750,12 +996,10 @@ class TestOVNBGPDriver(test_base.TestCase):
             '{}/128'.format(self.ipv6), 'fake-table')
         mock_add_route.assert_called_once_with(
             mock.ANY, self.ipv6, 'fake-table', self.bridge,
-            vlan=10, mask='128', via=self.fip)
-        expected_calls = [mock.call(CONF.bgp_nic,
-                                    ['2002::1234:abcd:ffff:c0a8:111']),
-                          mock.call(CONF.bgp_nic,
-                                    ['2002::1234:abcd:ffff:c0a8:121'])]
-        mock_add_ips_dev.assert_has_calls(expected_calls)
+            vlan=10, mask='128', via='2003::1234:abcd:ffff:c0a8:102')
+        mock_add_ips_dev.assert_called_once_with(
+            CONF.bgp_nic, ['2002::1234:abcd:ffff:c0a8:111',
+                           '2002::1234:abcd:ffff:c0a8:121'])
 
     @mock.patch.object(linux_net, 'add_ips_to_dev')
     @mock.patch.object(linux_net, 'add_ip_route')
@@ -772,6 +1016,10 @@ class TestOVNBGPDriver(test_base.TestCase):
         gateway = {}
         gateway['ips'] = ['{}/32'.format(self.fip),
                           '2003::1234:abcd:ffff:c0a8:102/128']
+        gateway['ips_without_mask'] = [self.fip,
+                                       '2003::1234:abcd:ffff:c0a8:102']
+        gateway['ip_versions'] = {constants.IP_VERSION_4,
+                                  constants.IP_VERSION_6}
         gateway['provider_datapath'] = 'bc6780f4-9510-4270-b4d2-b8d5c6802713'
         gateway['subnets_datapath'] = {}
         gateway['subnets_cidr'] = []
@@ -808,6 +1056,10 @@ class TestOVNBGPDriver(test_base.TestCase):
         gateway = {}
         gateway['ips'] = ['{}/32'.format(self.fip),
                           '2003::1234:abcd:ffff:c0a8:102/128']
+        gateway['ips_without_mask'] = [self.fip,
+                                       '2003::1234:abcd:ffff:c0a8:102']
+        gateway['ip_versions'] = {constants.IP_VERSION_4,
+                                  constants.IP_VERSION_6}
         gateway['provider_datapath'] = 'bc6780f4-9510-4270-b4d2-b8d5c6802713'
         gateway['subnets_datapath'] = {}
         gateway['subnets_cidr'] = []
@@ -843,6 +1095,10 @@ class TestOVNBGPDriver(test_base.TestCase):
         gateway = {}
         gateway['ips'] = ['{}/32'.format(self.fip),
                           '2003::1234:abcd:ffff:c0a8:102/128']
+        gateway['ips_without_mask'] = [self.fip,
+                                       '2003::1234:abcd:ffff:c0a8:102']
+        gateway['ip_versions'] = {constants.IP_VERSION_4,
+                                  constants.IP_VERSION_6}
         gateway['provider_datapath'] = 'bc6780f4-9510-4270-b4d2-b8d5c6802713'
         gateway['subnets_datapath'] = {}
         gateway['subnets_cidr'] = []
@@ -878,6 +1134,15 @@ class TestOVNBGPDriver(test_base.TestCase):
         ret = self.bgp_driver._get_bridge_for_datapath('fake-dp')
         self.assertEqual((self.bridge, None), ret)
 
+    def test__get_bridge_for_datapath_cached(self):
+        self.sb_idl.get_network_name_and_tag.return_value = (
+            'fake-network', [10])
+        self.bgp_driver._get_bridge_for_datapath('fake-dp')
+        ret = self.bgp_driver._get_bridge_for_datapath('fake-dp')
+        self.assertEqual((self.bridge, 10), ret)
+        self.sb_idl.get_network_name_and_tag.assert_called_once_with(
+            'fake-dp', mock.ANY)
+
     def test__get_bridge_for_datapath_no_network_name(self):
         self.sb_idl.get_network_name_and_tag.return_value = (None, None)
         ret = self.bgp_driver._get_bridge_for_datapath('fake-dp')
@@ -890,6 +1155,22 @@ class TestOVNBGPDriver(test_base.TestCase):
         mock_process_ovn_lb.assert_called_once_with(
             'fake-ip', 'fake-row', constants.EXPOSE)
 
+    def test_expose_ovn_lb_no_tenant_networks(self):
+        self.bgp_driver._expose_tenant_networks = False
+        mock_process_ovn_lb = mock.patch.object(
+            self.bgp_driver, '_process_ovn_lb').start()
+        row = fakes.create_object({'datapath': 'fake-dp'})
+        self.bgp_driver.expose_ovn_lb('fake-ip', row)
+        mock_process_ovn_lb.assert_not_called()
+
+    def test_expose_remote_ip_no_tenant_networks(self):
+        self.bgp_driver._expose_tenant_networks = False
+        mock_expose_remote_ip = mock.patch.object(
+            self.bgp_driver, '_expose_remote_ip').start()
+        row = fakes.create_object({'datapath': 'fake-dp'})
+        self.bgp_driver.expose_remote_ip([self.ipv4], row)
+        mock_expose_remote_ip.assert_not_called()
+
     def test_withdraw_ovn_lb(self):
         mock_process_ovn_lb = mock.patch.object(
             self.bgp_driver, '_process_ovn_lb').start()
@@ -1362,6 +1643,15 @@ class TestOVNBGPDriver(test_base.TestCase):
 
         # Assert that the add methods were called
         self.assertEqual(ips, ret)
+        self.assertEqual(
+            {self.cr_lrp0},
+            self.bgp_driver._cr_lrps_by_provider_dp['fake-provider-dp'])
+        self.assertEqual({'fake-router-dp': self.cr_lrp0},
+                         self.bgp_driver._cr_lrp_by_router_dp)
+        cr_lrp_info = self.bgp_driver.ovn_local_cr_lrps[self.cr_lrp0]
+        self.assertEqual(ips, cr_lrp_info['ips_without_mask'])
+        self.assertEqual({constants.IP_VERSION_4, constants.IP_VERSION_6},
+                         cr_lrp_info['ip_versions'])
         mock_ensure_mac_tweak.assert_called_once_with(mock.ANY, self.bridge,
                                                       {})
         mock_add_ip_dev.assert_called_once_with(
@@ -1390,6 +1680,34 @@ class TestOVNBGPDriver(test_base.TestCase):
         mock_expose_ovn_lb.assert_called_once_with(
             ovn_lb_vip, 'fake-vip-port', self.cr_lrp0)
 
+    def test__expose_ip_chassisredirect_port_expose_exception(self):
+        self.sb_idl.get_provider_datapath_from_cr_lrp.return_value = (
+            'fake-provider-dp')
+        mock_get_bridge = mock.patch.object(
+            self.bgp_driver, '_get_bridge_for_datapath').start()
+        mock_get_bridge.return_value = (self.bridge, 10)
+        mock_expose_cr_lrp = mock.patch.object(
+            self.bgp_driver, '_expose_cr_lrp_port').start()
+        mock_expose_cr_lrp.side_effect = (
+            agent_exc.NetworkInterfaceNotFound(device=self.bridge))
+        row = fakes.create_object({
+            'type': constants.OVN_CHASSISREDIRECT_VIF_PORT_TYPE,
+            'logical_port': self.cr_lrp0,
+            'mac': ['{} {} {}'.format(self.mac, self.ipv4, self.ipv6)],
+            'datapath': 'fake-router-dp'})
+
+        self.assertRaises(agent_exc.NetworkInterfaceNotFound,
+                          self.bgp_driver._expose_ip,
+                          [self.ipv4, self.ipv6], row)
+
+        # the information is kept so that the withdraw can clean up
+        self.assertIn(self.cr_lrp0, self.bgp_driver.ovn_local_cr_lrps)
+        self.assertEqual(
+            {self.cr_lrp0},
+            self.bgp_driver._cr_lrps_by_provider_dp['fake-provider-dp'])
+        self.assertEqual({'fake-router-dp': self.cr_lrp0},
+                         self.bgp_driver._cr_lrp_by_router_dp)
+
     @mock.patch.object(linux_net, 'add_ndp_proxy')
     @mock.patch.object(linux_net, 'add_ip_route')
     @mock.patch.object(linux_net, 'add_ip_rule')
@@ -1861,8 +2179,7 @@ class TestOVNBGPDriver(test_base.TestCase):
         mock_process_lrp_port.assert_not_called()
         mock_expose_ovn_lb.assert_not_called()
 
-    @mock.patch.object(linux_net, 'get_ip_version')
-    def test__withdraw_cr_lrp_port(self, mock_ip_version):
+    def test__withdraw_cr_lrp_port(self):
         mock_withdraw_provider_port = mock.patch.object(
             self.bgp_driver, '_withdraw_provider_port').start()
         mock_withdraw_lrp_port = mock.patch.object(
@@ -1871,8 +2188,6 @@ class TestOVNBGPDriver(test_base.TestCase):
             self.bgp_driver, '_withdraw_ovn_lb_on_provider').start()
 
         ips = [self.ipv4, self.ipv6]
-        mock_ip_version.side_effect = [constants.IP_VERSION_4,
-                                       constants.IP_VERSION_6]
         ovn_lb_vip_port = mock.Mock()
         gateway = {
             'ips': ips,
@@ -1881,8 +2196,13 @@ class TestOVNBGPDriver(test_base.TestCase):
             'bridge_device': self.bridge,
             'bridge_vlan': 10,
             'mac': self.mac,
-            'provider_ovn_lbs': [ovn_lb_vip_port]}
+            'provider_ovn_lbs': [ovn_lb_vip_port],
+            'router_datapath': 'fake-router-dp'}
         self.bgp_driver.ovn_local_cr_lrps = {'gateway_port': gateway}
+        self.bgp_driver._cr_lrps_by_provider_dp['fake-provider-dp'].add(
+            'gateway_port')
+        self.bgp_driver._cr_lrp_by_router_dp = {
+            'fake-router-dp': 'gateway_port'}
 
         self.bgp_driver._withdraw_cr_lrp_port(
             ips, self.mac, self.bridge, 10,
@@ -1896,9 +2216,43 @@ class TestOVNBGPDriver(test_base.TestCase):
                                                        'gateway_port')
         mock_withdraw_ovn_lb_on_provider.assert_called_once_with(
             ovn_lb_vip_port, 'gateway_port')
+        self.assertEqual(
+            set(), self.bgp_driver._cr_lrps_by_provider_dp['fake-provider-dp'])
+        self.assertEqual({}, self.bgp_driver._cr_lrp_by_router_dp)
+        self.assertEqual({}, self.bgp_driver.ovn_local_cr_lrps)
 
-    @mock.patch.object(linux_net, 'get_ip_version')
-    def test__withdraw_cr_lrp_port_withdraw_failure(self, mock_ip_version):
+    def test__withdraw_cr_lrp_port_shared_provider(self):
+        mock_withdraw_provider_port = mock.patch.object(
+            self.bgp_driver, '_withdraw_provider_port').start()
+        mock.patch.object(self.bgp_driver, '_withdraw_lrp_port').start()
+
+        ips = [self.ipv4, self.ipv6]
+        gateway = {
+            'ips': ips,
+            'provider_datapath': 'fake-provider-dp',
+            'subnets_cidr': [],
+            'bridge_device': self.bridge,
+            'bridge_vlan': 10,
+            'mac': self.mac,
+            'provider_ovn_lbs': []}
+        self.bgp_driver.ovn_local_cr_lrps = {'gateway_port': gateway,
+                                             'gateway_port2': gateway}
+        self.bgp_driver._cr_lrps_by_provider_dp['fake-provider-dp'].update(
+            ['gateway_port', 'gateway_port2'])
+
+        self.bgp_driver._withdraw_cr_lrp_port(
+            ips, self.mac, self.bridge, 10,
+            provider_datapath='fake-provider-dp', cr_lrp_port='gateway_port')
+
+        # the ndp proxy is still needed by the other cr-lrp
+        mock_withdraw_provider_port.assert_called_once_with(
+            ips, 'fake-provider-dp', bridge_device=self.bridge,
+            bridge_vlan=10, lladdr=self.mac, proxy_cidrs=[])
+        self.assertEqual(
+            {'gateway_port2'},
+            self.bgp_driver._cr_lrps_by_provider_dp['fake-provider-dp'])
+
+    def test__withdraw_cr_lrp_port_withdraw_failure(self):
         mock_withdraw_provider_port = mock.patch.object(
             self.bgp_driver, '_withdraw_provider_port').start()
         mock_withdraw_provider_port.return_value = False
@@ -1908,8 +2262,6 @@ class TestOVNBGPDriver(test_base.TestCase):
             self.bgp_driver, '_withdraw_ovn_lb_on_provider').start()
 
         ips = [self.ipv4, self.ipv6]
-        mock_ip_version.side_effect = [constants.IP_VERSION_4,
-                                       constants.IP_VERSION_6]
         ovn_lb_vip_port = mock.Mock()
         gateway = {
             'ips': ips,
@@ -1956,8 +2308,8 @@ class TestOVNBGPDriver(test_base.TestCase):
             'chassis': 'fake-chassis2'})
         self.sb_idl.get_ports_on_datapath.return_value = [dp_port0, dp_port1,
                                                           dp_port2]
-        mock_expose_tenant_port = mock.patch.object(
-            self.bgp_driver, '_expose_tenant_port').start()
+        mock_expose_tenant_ports = mock.patch.object(
+            self.bgp_driver, '_expose_tenant_ports').start()
 
         self.bgp_driver._expose_lrp_port(
             '{}/32'.format(self.ipv4), self.lrp0, self.cr_lrp0, 'fake-lrp-dp')
@@ -1967,14 +2319,10 @@ class TestOVNBGPDriver(test_base.TestCase):
         mock_add_route.assert_called_once_with(
             mock.ANY, self.ipv4, 'fake-table', self.bridge, vlan=None,
             mask='32', via=self.fip)
-        expected_calls = [
-            mock.call(dp_port0, ip_version=constants.IP_VERSION_4,
-                      exposed_ips=None, ovn_ip_rules=None),
-            mock.call(dp_port1, ip_version=constants.IP_VERSION_4,
-                      exposed_ips=None, ovn_ip_rules=None),
-            mock.call(dp_port2, ip_version=constants.IP_VERSION_4,
-                      exposed_ips=None, ovn_ip_rules=None)]
-        mock_expose_tenant_port.assert_has_calls(expected_calls)
+        mock_expose_tenant_ports.assert_called_once_with(
+            [dp_port0, dp_port1, dp_port2],
+            ip_version=constants.IP_VERSION_4, exposed_ips=None,
+            ovn_ip_rules=None)
 
     @mock.patch.object(linux_net, 'add_ip_route')
     @mock.patch.object(linux_net, 'add_ip_rule')
@@ -1999,8 +2347,8 @@ class TestOVNBGPDriver(test_base.TestCase):
             'chassis': 'fake-chassis2'})
         self.sb_idl.get_ports_on_datapath.return_value = [dp_port0, dp_port1,
                                                           dp_port2]
-        mock_expose_tenant_port = mock.patch.object(
-            self.bgp_driver, '_expose_tenant_port').start()
+        mock_expose_tenant_ports = mock.patch.object(
+            self.bgp_driver, '_expose_tenant_ports').start()
 
         mock_add_rule.side_effect = agent_exc.InvalidPortIP(ip=self.ipv4)
 
@@ -2010,7 +2358,27 @@ class TestOVNBGPDriver(test_base.TestCase):
         mock_add_rule.assert_called_once_with(
             '{}/32'.format(self.ipv4), 'fake-table')
         mock_add_route.assert_not_called()
-        mock_expose_tenant_port.assert_not_called()
+        mock_expose_tenant_ports.assert_not_called()
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    @mock.patch.object(wire_utils, 'wire_lrp_port')
+    def test__expose_lrp_port_batch_exception(self, mock_wire,
+                                              mock_netlink_batch):
+        def _wire_lrp_port(*args):
+            linux_net._get_netlink_batch().add(
+                'rule', 'add', dst=self.ipv4, table=7, dst_len=32,
+                family=constants.AF_INET)
+            return True
+        mock_wire.side_effect = _wire_lrp_port
+        mock_netlink_batch.side_effect = Exception
+        self.sb_idl.get_ports_on_datapath.return_value = []
+
+        self.bgp_driver._expose_lrp_port(
+            '{}/32'.format(self.ipv4), self.lrp0, self.cr_lrp0, 'fake-lrp-dp')
+
+        mock_netlink_batch.assert_called_once()
+        self.assertEqual(1, self.bgp_driver._failures)
+        self.assertIsNone(linux_net._get_netlink_batch())
 
     @mock.patch.object(linux_net, 'add_ip_route')
     @mock.patch.object(linux_net, 'add_ip_rule')
@@ -2024,6 +2392,10 @@ class TestOVNBGPDriver(test_base.TestCase):
         CONF.set_override('expose_ipv6_gua_tenant_networks', True)
         self.addCleanup(CONF.clear_override, 'expose_ipv6_gua_tenant_networks')
         mock_ipv6_gua.return_value = True
+        self.bgp_driver.ovn_local_cr_lrps[self.cr_lrp0][
+            'ips_without_mask'] = [self.fip, '2003::1234:abcd:ffff:c0a8:102']
+        self.bgp_driver.ovn_local_cr_lrps[self.cr_lrp0]['ip_versions'] = {
+            constants.IP_VERSION_4, constants.IP_VERSION_6}
         mock_ip_version.return_value = constants.IP_VERSION_6
         dp_port0 = fakes.create_object({
             'name': 'fake-port-dp0',
@@ -2042,8 +2414,8 @@ class TestOVNBGPDriver(test_base.TestCase):
             'chassis': 'fake-chassis2'})
         self.sb_idl.get_ports_on_datapath.return_value = [dp_port0, dp_port1,
                                                           dp_port2]
-        mock_expose_tenant_port = mock.patch.object(
-            self.bgp_driver, '_expose_tenant_port').start()
+        mock_expose_tenant_ports = mock.patch.object(
+            self.bgp_driver, '_expose_tenant_ports').start()
 
         self.bgp_driver._expose_lrp_port(
             '{}/128'.format(self.ipv6), self.lrp0, self.cr_lrp0, 'fake-lrp-dp')
@@ -2052,15 +2424,11 @@ class TestOVNBGPDriver(test_base.TestCase):
             '{}/128'.format(self.ipv6), 'fake-table')
         mock_add_route.assert_called_once_with(
             mock.ANY, self.ipv6, 'fake-table', self.bridge, vlan=None,
-            mask='128', via=self.fip)
-        expected_calls = [
-            mock.call(dp_port0, ip_version=constants.IP_VERSION_6,
-                      exposed_ips=None, ovn_ip_rules=None),
-            mock.call(dp_port1, ip_version=constants.IP_VERSION_6,
-                      exposed_ips=None, ovn_ip_rules=None),
-            mock.call(dp_port2, ip_version=constants.IP_VERSION_6,
-                      exposed_ips=None, ovn_ip_rules=None)]
-        mock_expose_tenant_port.assert_has_calls(expected_calls)
+            mask='128', via='2003::1234:abcd:ffff:c0a8:102')
+        mock_expose_tenant_ports.assert_called_once_with(
+            [dp_port0, dp_port1, dp_port2],
+            ip_version=constants.IP_VERSION_6, exposed_ips=None,
+            ovn_ip_rules=None)
 
     @mock.patch.object(linux_net, 'add_ip_route')
     @mock.patch.object(linux_net, 'add_ip_rule')
@@ -2089,8 +2457,8 @@ class TestOVNBGPDriver(test_base.TestCase):
             'chassis': 'fake-chassis2'})
         self.sb_idl.get_ports_on_datapath.return_value = [dp_port0, dp_port1,
                                                           dp_port2]
-        mock_expose_tenant_port = mock.patch.object(
-            self.bgp_driver, '_expose_tenant_port').start()
+        mock_expose_tenant_ports = mock.patch.object(
+            self.bgp_driver, '_expose_tenant_ports').start()
 
         self.bgp_driver._expose_lrp_port(
             'fdab:4ad8:e8fb:0:f816:3eff:fec6:469c/128', self.lrp0,
@@ -2098,10 +2466,10 @@ class TestOVNBGPDriver(test_base.TestCase):
 
         mock_add_rule.assert_not_called()
         mock_add_route.assert_not_called()
-        mock_expose_tenant_port.assert_not_called()
+        mock_expose_tenant_ports.assert_not_called()
 
     def test_expose_subnet(self):
-        self.sb_idl.is_router_gateway_on_chassis.return_value = self.cr_lrp0
+        self.bgp_driver._cr_lrp_by_router_dp = {'fake-dp': self.cr_lrp0}
         self.sb_idl.get_port_datapath.return_value = 'fake-port-dp'
         row = fakes.create_object({
             'name': 'fake-row',
@@ -2118,7 +2486,7 @@ class TestOVNBGPDriver(test_base.TestCase):
             'fake-ip', row.logical_port, self.cr_lrp0, 'fake-port-dp')
 
     def test_expose_subnet_no_cr_lrp(self):
-        self.sb_idl.is_router_gateway_on_chassis.return_value = None
+        self.bgp_driver._cr_lrp_by_router_dp = {'other-dp': self.cr_lrp0}
         self.sb_idl.get_port_datapath.return_value = 'fake-port-dp'
         row = fakes.create_object({
             'name': 'fake-row',
@@ -2134,7 +2502,7 @@ class TestOVNBGPDriver(test_base.TestCase):
         mock_expose_lrp_port.assert_not_called()
 
     def test_expose_subnet_address_scope(self):
-        self.sb_idl.is_router_gateway_on_chassis.return_value = self.cr_lrp0
+        self.bgp_driver._cr_lrp_by_router_dp = {'fake-dp': self.cr_lrp0}
         self.sb_idl.get_port_datapath.return_value = 'fake-port-dp'
         row = fakes.create_object({
             'name': 'fake-row',
@@ -2158,7 +2526,7 @@ class TestOVNBGPDriver(test_base.TestCase):
             'name': 'fake-row',
             'logical_port': 'subnet_port',
             'datapath': 'fake-dp'})
-        self.sb_idl.is_router_gateway_on_chassis.return_value = self.cr_lrp0
+        self.bgp_driver._cr_lrp_by_router_dp = {'fake-dp': self.cr_lrp0}
         mock_withdraw_lrp_port = mock.patch.object(
             self.bgp_driver, '_withdraw_lrp_port').start()
 
@@ -2172,7 +2540,7 @@ class TestOVNBGPDriver(test_base.TestCase):
             'name': 'fake-row',
             'logical_port': 'subnet_port',
             'datapath': 'fake-dp'})
-        self.sb_idl.is_router_gateway_on_chassis.return_value = None
+        self.bgp_driver._cr_lrp_by_router_dp = {'other-dp': self.cr_lrp0}
         mock_withdraw_lrp_port = mock.patch.object(
             self.bgp_driver, '_withdraw_lrp_port').start()
 
@@ -2180,30 +2548,32 @@ class TestOVNBGPDriver(test_base.TestCase):
 
         mock_withdraw_lrp_port.assert_not_called()
 
-    def test_withdraw_subnet_no_datapath_error(self):
+    def test_withdraw_subnet_router_gateway_port(self):
+        # e.g., the router is being deleted
         row = fakes.create_object({
             'name': 'fake-row',
             'logical_port': 'fake-logical-port',  # to match the cr-lrp name
             'datapath': 'fake-dp'})
-        self.sb_idl.is_router_gateway_on_chassis.side_effect = (
-            agent_exc.DatapathNotFound(datapath="fake-dp"))
-        mock_withdraw_lrp_port = mock.patch.object(
-            self.bgp_driver, '_withdraw_lrp_port').start()
+        self.bgp_driver._cr_lrp_by_router_dp = {'fake-dp': self.cr_lrp0}
+        self.bgp_driver.ovn_local_lrps = {self.lrp0: self.cr_lrp0}
+        mock_unwire = mock.patch.object(
+            wire_utils, 'unwire_lrp_port').start()
 
-        self.bgp_driver.withdraw_subnet('{}/32'.format(self.ipv4), row)
+        self.bgp_driver.withdraw_subnet('{}/32'.format(self.fip), row)
 
-        mock_withdraw_lrp_port.assert_not_called()
+        self.sb_idl.is_router_gateway_on_chassis.assert_not_called()
+        mock_unwire.assert_not_called()
+        self.assertEqual({self.lrp0: self.cr_lrp0},
+                         self.bgp_driver.ovn_local_lrps)
 
-    @mock.patch.object(linux_net, 'get_exposed_ips_on_network')
-    @mock.patch.object(linux_net, 'delete_exposed_ips')
+    @mock.patch.object(linux_net, 'delete_exposed_ips_on_network')
     @mock.patch.object(linux_net, 'del_ip_route')
     @mock.patch.object(linux_net, 'del_ip_rule')
     @mock.patch.object(linux_net, 'get_ip_version')
     def test__withdraw_lrp_port(
             self, mock_ip_version, mock_del_rule, mock_del_route,
-            mock_del_exposed_ips, mock_get_exposed_ips):
+            mock_del_exposed_ips):
         mock_ip_version.return_value = constants.IP_VERSION_4
-        mock_get_exposed_ips.return_value = [self.ipv4]
         self.bgp_driver.ovn_local_lrps = {self.lrp0: self.cr_lrp0}
 
         self.bgp_driver._withdraw_lrp_port(
@@ -2215,24 +2585,71 @@ class TestOVNBGPDriver(test_base.TestCase):
             mock.ANY, self.ipv4, 'fake-table', self.bridge, vlan=None,
             mask='32', via=self.fip)
         mock_del_exposed_ips.assert_called_once_with(
-            [self.ipv4], CONF.bgp_nic)
+            CONF.bgp_nic, ipaddress.ip_network('{}/32'.format(self.ipv4)))
+        self.assertEqual({}, self.bgp_driver.ovn_local_lrps)
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    @mock.patch.object(linux_net, 'delete_exposed_ips_on_network')
+    @mock.patch.object(wire_utils, 'unwire_lrp_port')
+    def test__withdraw_lrp_port_batch_exception(
+            self, mock_unwire, mock_del_exposed_ips, mock_netlink_batch):
+        def _unwire_lrp_port(*args):
+            linux_net._get_netlink_batch().add(
+                'rule', 'del', dst=self.ipv4, table=7, dst_len=32,
+                family=constants.AF_INET)
+        mock_unwire.side_effect = _unwire_lrp_port
+        mock_netlink_batch.side_effect = Exception
+        self.bgp_driver.ovn_local_lrps = {self.lrp0: self.cr_lrp0}
 
-    @mock.patch.object(linux_net, 'get_exposed_ips_on_network')
-    @mock.patch.object(linux_net, 'delete_exposed_ips')
+        self.bgp_driver._withdraw_lrp_port(
+            '{}/32'.format(self.ipv4), self.lrp0, self.cr_lrp0)
+
+        mock_netlink_batch.assert_called_once()
+        self.assertEqual(1, self.bgp_driver._failures)
+        self.assertIsNone(linux_net._get_netlink_batch())
+        self.assertEqual({}, self.bgp_driver.ovn_local_lrps)
+
+    @mock.patch.object(linux_net, 'del_ip_rule')
+    def test__withdraw_lrp_port_not_exposed(self, mock_del_rule):
+        self.bgp_driver.ovn_local_lrps = {'other-lrp': self.cr_lrp0}
+
+        self.bgp_driver._withdraw_lrp_port(
+            '{}/32'.format(self.ipv4), self.lrp0, self.cr_lrp0)
+
+        mock_del_rule.assert_not_called()
+        self.assertEqual({'other-lrp': self.cr_lrp0},
+                         self.bgp_driver.ovn_local_lrps)
+
+    @mock.patch.object(linux_net, 'delete_exposed_ips_on_network')
+    @mock.patch.object(linux_net, 'del_ip_route')
+    @mock.patch.object(linux_net, 'del_ip_rule')
+    def test__withdraw_lrp_port_no_lrp(self, mock_del_rule, *args):
+        self.bgp_driver.ovn_local_lrps = {self.lrp0: self.cr_lrp0}
+
+        self.bgp_driver._withdraw_lrp_port(
+            '192.168.1.1/24', None, self.cr_lrp0)
+
+        mock_del_rule.assert_called_once_with('192.168.1.1/24', 'fake-table')
+        self.assertEqual({}, self.bgp_driver.ovn_local_lrps)
+
+    @mock.patch.object(linux_net, 'delete_exposed_ips_on_network')
     @mock.patch.object(linux_net, 'del_ip_route')
     @mock.patch.object(linux_net, 'del_ip_rule')
     @mock.patch.object(linux_net, 'get_ip_version')
     @mock.patch.object(driver_utils, 'is_ipv6_gua')
     def test__withdraw_lrp_port_gua(
             self, mock_ipv6_gua, mock_ip_version, mock_del_rule,
-            mock_del_route, mock_del_exposed_ips, mock_get_exposed_ips):
+            mock_del_route, mock_del_exposed_ips):
         CONF.set_override('expose_tenant_networks', False)
         self.addCleanup(CONF.clear_override, 'expose_tenant_networks')
         CONF.set_override('expose_ipv6_gua_tenant_networks', True)
         self.addCleanup(CONF.clear_override, 'expose_ipv6_gua_tenant_networks')
         mock_ipv6_gua.return_value = True
+        self.bgp_driver.ovn_local_cr_lrps[self.cr_lrp0][
+            'ips_without_mask'] = [self.fip, '2003::1234:abcd:ffff:c0a8:102']
+        self.bgp_driver.ovn_local_cr_lrps[self.cr_lrp0]['ip_versions'] = {
+            constants.IP_VERSION_4, constants.IP_VERSION_6}
         mock_ip_version.return_value = constants.IP_VERSION_6
-        mock_get_exposed_ips.return_value = [self.ipv6]
         self.bgp_driver.ovn_local_lrps = {self.lrp0: self.cr_lrp0}
 
         self.bgp_driver._withdraw_lrp_port(
@@ -2242,24 +2659,22 @@ class TestOVNBGPDriver(test_base.TestCase):
             '{}/128'.format(self.ipv6), 'fake-table')
         mock_del_route.assert_called_once_with(
             mock.ANY, self.ipv6, 'fake-table', self.bridge, vlan=None,
-            mask='128', via=self.fip)
+            mask='128', via='2003::1234:abcd:ffff:c0a8:102')
         mock_del_exposed_ips.assert_called_once_with(
-            [self.ipv6], CONF.bgp_nic)
+            CONF.bgp_nic, ipaddress.ip_network('{}/128'.format(self.ipv6)))
 
-    @mock.patch.object(linux_net, 'get_exposed_ips_on_network')
-    @mock.patch.object(linux_net, 'delete_exposed_ips')
+    @mock.patch.object(linux_net, 'delete_exposed_ips_on_network')
     @mock.patch.object(linux_net, 'del_ip_route')
     @mock.patch.object(linux_net, 'del_ip_rule')
     @mock.patch.object(driver_utils, 'is_ipv6_gua')
     def test__withdraw_lrp_port_no_gua(
             self, mock_ipv6_gua, mock_del_rule, mock_del_route,
-            mock_del_exposed_ips, mock_get_exposed_ips):
+            mock_del_exposed_ips):
         CONF.set_override('expose_tenant_networks', False)
         self.addCleanup(CONF.clear_override, 'expose_tenant_networks')
         CONF.set_override('expose_ipv6_gua_tenant_networks', True)
         self.addCleanup(CONF.clear_override, 'expose_ipv6_gua_tenant_networks')
         mock_ipv6_gua.return_value = False
-        mock_get_exposed_ips.return_value = [self.ipv6]
         self.bgp_driver.ovn_local_lrps = {self.lrp0: self.cr_lrp0}
 
         self.bgp_driver._withdraw_lrp_port(
@@ -2343,3 +2758,23 @@ class TestOVNBGPDriver(test_base.TestCase):
 
         self.assertEqual(False, ret)
         m_addr_scopes.assert_called_once_with(sb_port)
+
+    def test__get_ip_version_and_host_mask(self):
+        self.assertEqual(
+            (constants.IP_VERSION_4, '/32'),
+            ovn_bgp_driver._get_ip_version_and_host_mask(self.ipv4))
+        self.assertEqual(
+            (constants.IP_VERSION_6, '/128'),
+            ovn_bgp_driver._get_ip_version_and_host_mask(self.ipv6))
+        self.assertEqual(
+            (constants.IP_VERSION_6, '/128'),
+            ovn_bgp_driver._get_ip_version_and_host_mask(self.ipv6 + '/64'))
+
+    def test__get_ip_rule_dst(self):
+        self.assertEqual('{}/32'.format(self.ipv4),
+                         ovn_bgp_driver._get_ip_rule_dst(self.ipv4))
+        self.assertEqual('{}/128'.format(self.ipv6),
+                         ovn_bgp_driver._get_ip_rule_dst(self.ipv6))
+        # the same dst is reused for the same IP
+        self.assertIs(ovn_bgp_driver._get_ip_rule_dst(self.ipv4),
+                      ovn_bgp_driver._get_ip_rule_dst(self.ipv4))
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import ipaddress
 from unittest import mock
 
 from oslo_config import cfg
@@ -163,10 +164,32 @@ class TestOVNEVPNDriver(test_base.TestCase):
         self.evpn_driver._ensure_network_exposed(lrp, gateway)
 
         mock_expose_subnet.assert_called_once_with(
-            self.ipv4, ['10.10.10.1'],
+            self.ipv4,
             {'ips': ['10.10.10.1/32'], 'provider_datapath': 'fake-prov-dp'},
             self.bridge, self.vlan_tag, 'fake-dp')
 
+    def test__ensure_network_exposed_no_peer(self):
+        self.sb_idl.get_evpn_info_from_port_name.return_value = 'fake-info'
+        mock_expose_subnet = mock.patch.object(
+            self.evpn_driver, '_expose_subnet').start()
+        mock_get_bridge = mock.patch.object(
+            self.evpn_driver, '_get_bridge_for_datapath').start()
+        mock_get_bridge.return_value = (self.bridge, self.vlan_tag)
+        gateway = {'ips': ['10.10.10.1/32'],
+                   'provider_datapath': 'fake-prov-dp'}
+        lrp = fakes.create_object({
+            'name': 'fake-lrp',
+            'logical_port': self.cr_lrp,
+            'mac': ['{} {}'.format(self.mac, self.ipv4)],
+            'options': {},
+            'datapath': 'fake-dp'})
+
+        self.evpn_driver._ensure_network_exposed(lrp, gateway)
+
+        self.sb_idl.get_port_datapath.assert_not_called()
+        mock_expose_subnet.assert_called_once_with(
+            self.ipv4, gateway, self.bridge, self.vlan_tag, None)
+
     def test__get_bridge_for_datapath(self):
         self.sb_idl.get_network_name_and_tag.return_value = (
             'fake-network', [self.vlan_tag])
@@ -179,6 +202,15 @@ class TestOVNEVPNDriver(test_base.TestCase):
         ret = self.evpn_driver._get_bridge_for_datapath('fake-dp')
         self.assertEqual((self.bridge, None), ret)
 
+    def test__get_bridge_for_datapath_cached(self):
+        self.sb_idl.get_network_name_and_tag.return_value = (
+            'fake-network', [self.vlan_tag])
+        self.evpn_driver._get_bridge_for_datapath('fake-dp')
+        ret = self.evpn_driver._get_bridge_for_datapath('fake-dp')
+        self.assertEqual((self.bridge, self.vlan_tag), ret)
+        self.sb_idl.get_network_name_and_tag.assert_called_once_with(
+            'fake-dp', mock.ANY)
+
     def test__get_bridge_for_datapath_no_network_name(self):
         self.sb_idl.get_network_name_and_tag.return_value = (None, None)
         ret = self.evpn_driver._get_bridge_for_datapath('fake-dp')
@@ -385,22 +417,21 @@ class TestOVNEVPNDriver(test_base.TestCase):
         self.evpn_driver.expose_subnet(row)
 
         mock_expose_subnet.assert_called_once_with(
-            self.ipv4, [self.fip],
-            self.evpn_driver.ovn_local_cr_lrps[self.cr_lrp],
+            self.ipv4, self.evpn_driver.ovn_local_cr_lrps[self.cr_lrp],
             self.bridge, self.vlan_tag, 'fake-dp')
 
     @mock.patch.object(linux_net, 'add_ips_to_dev')
     @mock.patch.object(ovs, 'ensure_evpn_ovs_flow')
     @mock.patch.object(linux_net, 'add_ip_route')
-    @mock.patch.object(linux_net, 'get_ip_version')
     def _test__expose_subnet(
-            self, mock_ip_version, mock_add_route, mock_ensure_evpn_flow,
-            mock_add_ip_dev, use_ipv6=False):
+            self, mock_add_route, mock_ensure_evpn_flow, mock_add_ip_dev,
+            use_ipv6=False):
         # IPv4 vs IPv6 mocks
         ip = self.ipv6 if use_ipv6 else self.ipv4
-        mock_ip_version.return_value = (
-            constants.IP_VERSION_6 if use_ipv6 else constants.IP_VERSION_4)
         cidr = '128' if use_ipv6 else '32'
+        cr_lrp_ip = '2002::1' if use_ipv6 else self.fip
+        ip2 = '2002::20' if use_ipv6 else '10.0.0.20'
+        other_ip = '10.0.0.30' if use_ipv6 else '2002::30'
 
         port0 = fakes.create_object({
             'name': 'fake-port0',
@@ -411,24 +442,42 @@ class TestOVNEVPNDriver(test_base.TestCase):
             'datapath': 'fake-dp'})
         port1 = fakes.create_object({
             'name': 'fake-port1',
+            'chassis': [],
+            'type': constants.OVN_VM_VIF_PORT_TYPE})
+        port2 = fakes.create_object({
+            'name': 'fake-port2',
+            'type': constants.OVN_VIRTUAL_VIF_PORT_TYPE,
+            'chassis': [],
+            'mac': ['{} {} {}'.format(self.mac, ip2, other_ip)],
+            'datapath': 'fake-dp'})
+        port3 = fakes.create_object({
+            'name': 'fake-port3',
+            'type': constants.OVN_VM_VIF_PORT_TYPE,
             'chassis': 'fake-chassis',
-            'type': 'unknown-type'})
-        self.sb_idl.get_ports_on_datapath.return_value = [port0, port1]
+            'mac': [],
+            'datapath': 'fake-dp'})
+        self.sb_idl.get_vm_ports_on_datapath.return_value = [
+            port0, port1, port2, port3]
+
+        self.evpn_driver.ovn_local_cr_lrps[self.cr_lrp]['ips'] = [
+            '{}/32'.format(self.fip), '2002::1/64']
 
         self.evpn_driver._expose_subnet(
-            '{}/{}'.format(ip, cidr), [self.fip],
+            '{}/{}'.format(ip, cidr),
             self.evpn_driver.ovn_local_cr_lrps[self.cr_lrp], self.bridge,
             10, 'fake-dp')
 
         mock_add_route.assert_called_once_with(
             mock.ANY, ip, self.vni, 'fake-vlan',
-            mask=cidr, via=self.fip)
+            mask=cidr, via=cr_lrp_ip)
         mock_ensure_evpn_flow.assert_called_once_with(
             self.bridge, constants.OVS_VRF_RULE_COOKIE, self.mac,
             'fake-vlan', 'fake-vlan', '{}/{}'.format(ip, cidr),
             strip_vlan=True)
         mock_add_ip_dev.assert_called_once_with(
-            'fake-lo', [ip], clear_local_route_at_table=self.vni)
+            'fake-lo', [ip, ip2], clear_local_route_at_table=self.vni)
+        self.assertEqual(
+            {'fake-lo': [ip, ip2]}, self.evpn_driver._ovn_exposed_evpn_ips)
 
     def test__expose_subnet(self):
         self._test__expose_subnet()
@@ -436,19 +485,39 @@ class TestOVNEVPNDriver(test_base.TestCase):
     def test__expose_subnet_ipv6(self):
         self._test__expose_subnet(use_ipv6=True)
 
-    @mock.patch.object(linux_net, 'delete_exposed_ips')
-    @mock.patch.object(linux_net, 'get_exposed_ips_on_network')
+    @mock.patch.object(linux_net, 'add_ips_to_dev')
+    @mock.patch.object(ovs, 'ensure_evpn_ovs_flow')
+    @mock.patch.object(linux_net, 'add_ip_route')
+    def test__expose_subnet_no_cr_lrp_ip_version(
+            self, mock_add_route, mock_ensure_evpn_flow, mock_add_ip_dev):
+        self.evpn_driver.ovn_local_cr_lrps[self.cr_lrp]['ips'] = [
+            '{}/32'.format(self.fip)]
+        self.sb_idl.get_vm_ports_on_datapath.return_value = []
+
+        self.evpn_driver._expose_subnet(
+            '{}/128'.format(self.ipv6),
+            self.evpn_driver.ovn_local_cr_lrps[self.cr_lrp], self.bridge,
+            10, 'fake-dp')
+
+        mock_add_route.assert_not_called()
+        mock_ensure_evpn_flow.assert_called_once_with(
+            self.bridge, constants.OVS_VRF_RULE_COOKIE, self.mac,
+            'fake-vlan', 'fake-vlan', '{}/128'.format(self.ipv6),
+            strip_vlan=True)
+        mock_add_ip_dev.assert_not_called()
+
+    @mock.patch.object(linux_net, 'delete_exposed_ips_on_network')
     @mock.patch.object(ovs, 'remove_evpn_network_ovs_flow')
     @mock.patch.object(linux_net, 'del_ip_route')
-    @mock.patch.object(linux_net, 'get_ip_version')
     def _test_withdraw_subnet(
-            self, mock_ip_version, mock_del_route, mock_remove_evpn_flows,
-            mock_get_ips, mock_del_ips, use_ipv6=False):
+            self, mock_del_route, mock_remove_evpn_flows, mock_del_ips,
+            use_ipv6=False):
         # IPv4 vs IPv6 mocks
         ip = self.ipv6 if use_ipv6 else self.ipv4
-        mock_ip_version.return_value = (
-            constants.IP_VERSION_6 if use_ipv6 else constants.IP_VERSION_4)
         cidr = '128' if use_ipv6 else '32'
+        cr_lrp_ip = '2002::1' if use_ipv6 else self.fip
+        self.evpn_driver.ovn_local_cr_lrps[self.cr_lrp]['ips'] = [
+            self.fip, '2002::1']
 
         self.evpn_driver.ovn_local_lrps = {
             'lrp-port': {'datapath': 'fake-dp',
@@ -457,9 +526,6 @@ class TestOVNEVPNDriver(test_base.TestCase):
         mock_get_bridge = mock.patch.object(
             self.evpn_driver, '_get_bridge_for_datapath').start()
         mock_get_bridge.return_value = (self.bridge, self.vlan_tag)
-        net_ips = ['10.10.10.1', '2001:0db8:85a3:0000:0000:8a2e:0370:7334']
-        mock_get_ips.return_value = net_ips
-
         row = fakes.create_object({
             'name': 'fake-row',
             'logical_port': 'port'})
@@ -467,11 +533,12 @@ class TestOVNEVPNDriver(test_base.TestCase):
 
         mock_del_route.assert_called_once_with(
             mock.ANY, ip, self.vni, 'fake-vlan',
-            mask=cidr, via=self.fip)
+            mask=cidr, via=cr_lrp_ip)
         mock_remove_evpn_flows.assert_called_once_with(
             self.bridge, constants.OVS_VRF_RULE_COOKIE, self.mac,
             '{}/{}'.format(ip, cidr))
-        mock_del_ips.assert_called_once_with(net_ips, 'fake-lo')
+        mock_del_ips.assert_called_once_with(
+            'fake-lo', ipaddress.ip_network('{}/{}'.format(ip, cidr)))
 
     def test_withdraw_subnet(self):
         self._test_withdraw_subnet()
@@ -479,6 +546,33 @@ class TestOVNEVPNDriver(test_base.TestCase):
     def test_withdraw_subnet_ipv6(self):
         self._test_withdraw_subnet(use_ipv6=True)
 
+    @mock.patch.object(linux_net, 'delete_exposed_ips_on_network')
+    @mock.patch.object(ovs, 'remove_evpn_network_ovs_flow')
+    @mock.patch.object(linux_net, 'del_ip_route')
+    def test_withdraw_subnet_no_cr_lrp_ip_version(
+            self, mock_del_route, mock_remove_evpn_flows, mock_del_ips):
+        # the cr-lrp only has an IPv4 address
+        self.evpn_driver.ovn_local_lrps = {
+            'lrp-port': {'datapath': 'fake-dp',
+                         'ip': '{}/128'.format(self.ipv6)}}
+        self.sb_idl.is_router_gateway_on_chassis.return_value = self.cr_lrp
+        mock_get_bridge = mock.patch.object(
+            self.evpn_driver, '_get_bridge_for_datapath').start()
+        mock_get_bridge.return_value = (self.bridge, self.vlan_tag)
+
+        row = fakes.create_object({
+            'name': 'fake-row',
+            'logical_port': 'port'})
+        self.evpn_driver.withdraw_subnet(row)
+
+        mock_del_route.assert_not_called()
+        net = ipaddress.ip_network('{}/128'.format(self.ipv6))
+        mock_remove_evpn_flows.assert_called_once_with(
+            self.bridge, constants.OVS_VRF_RULE_COOKIE, self.mac,
+            '{}'.format(net))
+        mock_del_ips.assert_called_once_with('fake-lo', net)
+        self.assertEqual({}, self.evpn_driver.ovn_local_lrps)
+
     @mock.patch.object(linux_net, 'ensure_veth')
     @mock.patch.object(linux_net, 'enable_proxy_ndp')
     @mock.patch.object(linux_net, 'set_device_status')
@@ -563,14 +657,11 @@ class TestOVNEVPNDriver(test_base.TestCase):
 
     @mock.patch.object(linux_net, 'add_unreachable_route')
     @mock.patch.object(linux_net, 'add_ndp_proxy')
-    @mock.patch.object(linux_net, 'get_ip_version')
     @mock.patch.object(linux_net, 'add_ip_route')
     @mock.patch.object(ovs, 'add_device_to_ovs_bridge')
     def _test__connect_evpn_to_ovn(
-            self, mock_add_ovs_bridge, mock_add_route, mock_ip_version,
-            mock_add_ndp_proxy, mock_add_unreachable_route, use_vlan=True):
-        mock_ip_version.side_effect = (constants.IP_VERSION_4,
-                                       constants.IP_VERSION_6)
+            self, mock_add_ovs_bridge, mock_add_route, mock_add_ndp_proxy,
+            mock_add_unreachable_route, use_vlan=True):
         vrf = 'fake-vrf'
         veth_vrf = 'fake-veth-vrf'
         veth_ovs = 'fake-veth-ovs'
@@ -608,12 +699,9 @@ class TestOVNEVPNDriver(test_base.TestCase):
     @mock.patch.object(linux_net, 'del_ndp_proxy')
     @mock.patch.object(linux_net, 'delete_routes_from_table')
     @mock.patch.object(ovs, 'del_device_from_ovs_bridge')
-    @mock.patch.object(linux_net, 'get_ip_version')
     def _test_disconnect_evpn_from_ovn(
-            self, mock_ip_version, mock_del_device, mock_delete_routes,
-            mock_del_ndp, use_vlan=True, clean_ndp=True):
-        mock_ip_version.side_effect = (constants.IP_VERSION_4,
-                                       constants.IP_VERSION_6)
+            self, mock_del_device, mock_delete_routes, mock_del_ndp,
+            use_vlan=True, clean_ndp=True):
         dp_bridge = 'datapath-bridge'
         ips = [self.ipv4, self.ipv6]
         vlan_tag = self.vlan_tag if use_vlan else None
@@ -757,6 +845,27 @@ class TestOVNEVPNDriver(test_base.TestCase):
                                     constants.OVS_VRF_RULE_COOKIE)]
         mock_del_flow.assert_has_calls(expected_calls)
 
+    @mock.patch.object(ovs, 'get_device_port_at_ovs')
+    @mock.patch.object(ovs, 'get_flow_info')
+    @mock.patch.object(ovs, 'get_bridge_flows')
+    @mock.patch.object(ovs, 'del_flow')
+    def test_remove_extra_ovs_flows_port_ipv6_src_matching_route(
+            self, mock_del_flow, mock_get_flows, mock_flow_info,
+            mock_get_port_ovs):
+        mock_get_port_ovs.return_value = 'fake-port'
+        self.evpn_driver._ovn_routing_tables_routes = {
+            'fake-vlan': [{'route': {'dst': self.ipv6, 'dst_len': 128}}]}
+        mock_flow_info.return_value = {
+            'mac': self.mac,
+            'port': 'fake-port',
+            'ipv6_src': '{}/128'.format(self.ipv6),
+        }
+        mock_get_flows.return_value = ['fake-flow0']
+
+        self.evpn_driver._remove_extra_ovs_flows()
+
+        mock_del_flow.assert_not_called()
+
     @mock.patch.object(ovs, 'get_flow_info')
     @mock.patch.object(ovs, 'get_bridge_flows')
     @mock.patch.object(ovs, 'del_flow')
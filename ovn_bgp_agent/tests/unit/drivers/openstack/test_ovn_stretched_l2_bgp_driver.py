@@ -400,6 +400,54 @@ class TestOVNBGPStretchedL2Driver(test_base.TestCase):
             row, self.cr_lrp0.logical_port, ["3.3.3.3/24"], ["1.1.1.1/24"]
         )
 
+    @mock.patch('oslo_concurrency.lockutils.lock')
+    def test_expose_subnet_lock(self, mock_lock):
+        mock__ensure_network_exposed = mock.patch.object(
+            self.bgp_driver, "_ensure_network_exposed"
+        ).start()
+        self.sb_idl.is_router_gateway_on_any_chassis.return_value = (
+            self.cr_lrp0
+        )
+        row = mock.Mock()
+        row.datapath = "fake-dp"
+
+        self.bgp_driver.expose_subnet(None, row)
+
+        mock_lock.assert_called_once_with("bgp")
+        mock__ensure_network_exposed.assert_called_once_with(
+            row, self.cr_lrp0.logical_port
+        )
+
+    @mock.patch('oslo_concurrency.lockutils.lock')
+    def test_expose_subnet_no_gateway_port_no_lock(self, mock_lock):
+        self.sb_idl.is_router_gateway_on_any_chassis.return_value = None
+        row = mock.Mock()
+        row.datapath = "fake-dp"
+
+        self.bgp_driver.expose_subnet(None, row)
+
+        mock_lock.assert_not_called()
+
+    def test_update_subnet_no_old_mac(self):
+        mock__update_network = mock.patch.object(
+            self.bgp_driver, "_update_network"
+        ).start()
+        self.sb_idl.is_router_gateway_on_any_chassis.return_value = (
+            self.cr_lrp0
+        )
+        old = mock.Mock()
+        old.mac = []
+
+        row = mock.Mock()
+        row.datapath = "fake-dp"
+        row.mac = ["ff:ff:ff:ff:ff:01 2.2.2.2/24"]
+
+        self.bgp_driver.update_subnet(old, row)
+
+        mock__update_network.assert_called_once_with(
+            row, self.cr_lrp0.logical_port, ["2.2.2.2/24"], []
+        )
+
     def test_update_subnet_no_datapath(self):
         mock__update_network = mock.patch.object(
             self.bgp_driver, "_update_network"
@@ -232,6 +232,20 @@ class TestOvsdbSbOvnIdl(test_base.TestCase):
         self.sb_idl.db_find_rows = mock.Mock()
         self.sb_idl.db_list_rows = mock.Mock()
 
+    @mock.patch.object(ovn_utils.Backend, 'autocreate_indices')
+    def test_autocreate_indices(self, m_autocreate):
+        with mock.patch.object(self.sb_idl, 'create_index') as m_index:
+            self.sb_idl.autocreate_indices()
+            m_autocreate.assert_called_once_with()
+            m_index.assert_called_once_with('Port_Binding', 'datapath')
+
+    @mock.patch.object(ovn_utils.Backend, 'autocreate_indices')
+    def test_autocreate_indices_already_exists(self, m_autocreate):
+        with mock.patch.object(self.sb_idl, 'create_index') as m_index:
+            m_index.side_effect = ValueError
+            self.sb_idl.autocreate_indices()
+            m_index.assert_called_once_with('Port_Binding', 'datapath')
+
     def test_get_port_by_name(self):
         fake_p_info = 'fake-port-info'
         port = 'fake-port'
@@ -273,6 +287,22 @@ class TestOvsdbSbOvnIdl(test_base.TestCase):
         self.sb_idl.db_find_rows.assert_called_once_with(
             'Port_Binding', ('datapath', '=', dp), ('type', '=', p_type))
 
+    def test_get_vm_ports_on_datapath(self):
+        dp = 'fake-datapath'
+        port0 = fakes.create_object(
+            {'name': 'port-0', 'type': constants.OVN_VM_VIF_PORT_TYPE})
+        port1 = fakes.create_object(
+            {'name': 'port-1', 'type': constants.OVN_VIRTUAL_VIF_PORT_TYPE})
+        port2 = fakes.create_object(
+            {'name': 'port-2', 'type': constants.OVN_PATCH_VIF_PORT_TYPE})
+        self.sb_idl.db_find_rows.return_value.execute.return_value = [
+            port0, port1, port2]
+        ret = self.sb_idl.get_vm_ports_on_datapath(dp)
+
+        self.assertEqual([port0, port1], ret)
+        self.sb_idl.db_find_rows.assert_called_once_with(
+            'Port_Binding', ('datapath', '=', dp))
+
     def test_get_ports_by_type(self):
         fake_p_info = 'fake-port-info'
         port_type = 'fake-type'
@@ -383,6 +413,29 @@ class TestOvsdbSbOvnIdl(test_base.TestCase):
     def test_is_port_deleted_false(self):
         self._test_is_port_deleted(port_exist=False)
 
+    def test_get_port_bindings_index(self):
+        port0 = fakes.create_object({
+            'logical_port': 'port-0', 'datapath': 'dp-0',
+            'type': constants.OVN_VM_VIF_PORT_TYPE})
+        port1 = fakes.create_object({
+            'logical_port': 'port-1', 'datapath': 'dp-0',
+            'type': constants.OVN_PATCH_VIF_PORT_TYPE})
+        port2 = fakes.create_object({
+            'logical_port': 'port-2', 'datapath': 'dp-1',
+            'type': constants.OVN_PATCH_VIF_PORT_TYPE})
+        self.sb_idl.db_list_rows.return_value.execute.return_value = [
+            port0, port1, port2]
+
+        ret = self.sb_idl.get_port_bindings_index()
+
+        self.sb_idl.db_list_rows.assert_called_once_with('Port_Binding')
+        self.assertEqual({'dp-0': [port0, port1], 'dp-1': [port2]},
+                         ret.ports_by_datapath)
+        self.assertEqual({'port-0': port0, 'port-1': port1, 'port-2': port2},
+                         ret.port_by_name)
+        self.assertEqual({'dp-0': [port1], 'dp-1': [port2]},
+                         ret.lrp_ports_by_datapath)
+
     def test_get_ports_on_chassis(self):
         ch0 = fakes.create_object({'name': 'chassis-0'})
         ch1 = fakes.create_object({'name': 'chassis-1'})
@@ -393,6 +393,32 @@ class TestWire(test_base.TestCase):
             routing_tables_routes, port_ips, bridge_device, bridge_vlan,
             routing_table, proxy_cidrs, lladdr=None)
 
+    def test__get_ipv6_cidrs(self):
+        cidrs = ['10.0.0.1', 'fd00::1', '10.0.0.0/24', 'fd00::/64']
+        self.assertEqual(['fd00::1', 'fd00::/64'],
+                         wire._get_ipv6_cidrs(cidrs))
+        self.assertEqual([], wire._get_ipv6_cidrs(['10.0.0.1']))
+
+    @mock.patch.object(linux_net, 'del_ndp_proxy')
+    @mock.patch.object(linux_net, 'del_ip_route')
+    @mock.patch.object(linux_net, 'del_ip_rule')
+    def test__unwire_provider_port_underlay(self, m_ip_rule, m_ip_route,
+                                            m_ndp_proxy):
+        routing_tables_routes = {}
+        port_ips = ['10.0.0.1', 'fd00::1']
+        routing_table = {'fake-bridge': 5}
+
+        ret = wire._unwire_provider_port_underlay(
+            routing_tables_routes, port_ips, 'fake-bridge', None,
+            routing_table, ['fd00::1'], lladdr='fake-mac')
+
+        self.assertTrue(ret)
+        m_ip_rule.assert_has_calls([
+            mock.call('10.0.0.1/32', 5, dev='fake-bridge', lladdr='fake-mac'),
+            mock.call('fd00::1/128', 5, dev='fake-bridge',
+                      lladdr='fake-mac')])
+        m_ndp_proxy.assert_called_once_with('fd00::1', 'fake-bridge', None)
+
     @mock.patch.object(wire, '_unwire_provider_port_ovn')
     def test_unwire_provider_port_ovn(self, mock_ovn):
         CONF.set_override('exposing_method', 'ovn')
@@ -486,16 +512,14 @@ class TestWire(test_base.TestCase):
             routing_tables, cr_lrp_ips)
 
     @mock.patch.object(linux_net, 'add_ip_route')
-    @mock.patch.object(linux_net, 'get_ip_version')
     @mock.patch.object(linux_net, 'add_ip_rule')
-    def test__wire_lrp_port_underlay(self, m_ip_rule, m_ip_version,
-                                     m_ip_route):
+    def test__wire_lrp_port_underlay(self, m_ip_rule, m_ip_route):
         routing_tables_routes = {}
         ip = '10.0.0.1/24'
         bridge_device = 'fake-bridge'
         bridge_vlan = '101'
         routing_tables = {'fake-bridge': 5}
-        cr_lrp_ips = ['fake-crlrp-ip']
+        cr_lrp_ips = ['fd00::1', '172.24.4.10']
 
         ret = wire._wire_lrp_port_underlay(routing_tables_routes, ip,
                                            bridge_device, bridge_vlan,
@@ -504,7 +528,7 @@ class TestWire(test_base.TestCase):
         m_ip_rule.assert_called_once_with(ip, 5)
         m_ip_route.assert_called_once_with(
             routing_tables_routes, '10.0.0.1', 5, 'fake-bridge',
-            vlan='101', mask='24', via='fake-crlrp-ip')
+            vlan='101', mask='24', via='172.24.4.10')
 
     @mock.patch.object(linux_net, 'add_ip_rule')
     def test__wire_lrp_port_underlay_no_bridge(self, m_ip_rule):
@@ -542,16 +566,14 @@ class TestWire(test_base.TestCase):
         m_ip_version.assert_not_called()
 
     @mock.patch.object(linux_net, 'del_ip_route')
-    @mock.patch.object(linux_net, 'get_ip_version')
     @mock.patch.object(linux_net, 'del_ip_rule')
-    def test__unwire_lrp_port_underlay(self, m_ip_rule, m_ip_version,
-                                       m_ip_route):
+    def test__unwire_lrp_port_underlay(self, m_ip_rule, m_ip_route):
         routing_tables_routes = {}
         ip = '10.0.0.1/24'
         bridge_device = 'fake-bridge'
         bridge_vlan = '101'
         routing_tables = {'fake-bridge': 5}
-        cr_lrp_ips = ['fake-crlrp-ip']
+        cr_lrp_ips = ['fd00::1', '172.24.4.10']
 
         ret = wire._unwire_lrp_port_underlay(routing_tables_routes, ip,
                                              bridge_device, bridge_vlan,
@@ -560,7 +582,7 @@ class TestWire(test_base.TestCase):
         m_ip_rule.assert_called_once_with(ip, 5)
         m_ip_route.assert_called_once_with(
             routing_tables_routes, '10.0.0.1', 5, 'fake-bridge',
-            vlan='101', mask='24', via='fake-crlrp-ip')
+            vlan='101', mask='24', via='172.24.4.10')
 
     @mock.patch.object(linux_net, 'del_ip_rule')
     def test__unwire_lrp_port_underlay_no_bridge(self, m_ip_rule):
@@ -17,10 +17,32 @@ from unittest import mock
 
 from ovn_bgp_agent import constants
 from ovn_bgp_agent.drivers.openstack.watchers import base_watcher
+from ovn_bgp_agent import exceptions as agent_exc
 from ovn_bgp_agent.tests import base as test_base
 from ovn_bgp_agent.tests import utils
 
 
+class FakeEvent(base_watcher.Event):
+    def __init__(self, bgp_agent):
+        self.agent = bgp_agent
+        super(FakeEvent, self).__init__((self.ROW_CREATE,), 'fake-table',
+                                        None)
+
+    def _run(self, event, row, old):
+        raise agent_exc.DatapathNotFound(datapath='fake-dp')
+
+
+class TestEvent(test_base.TestCase):
+
+    def test_run_exception(self):
+        agent = mock.Mock()
+        event = FakeEvent(agent)
+
+        event.run(event.ROW_CREATE, mock.Mock(), mock.Mock())
+
+        agent.record_failure.assert_called_once_with()
+
+
 class FakePortBindingChassisEvent(base_watcher.PortBindingChassisEvent):
     def run(self):
         pass
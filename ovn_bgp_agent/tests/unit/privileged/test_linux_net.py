@@ -13,9 +13,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import errno
+import threading
 from unittest import mock
 
 from oslo_concurrency import processutils
+from pyroute2.netlink import exceptions as netlink_exceptions
+
+from ovn_bgp_agent import constants
 
 from ovn_bgp_agent.privileged import linux_net as priv_linux_net
 from ovn_bgp_agent.tests import base as test_base
@@ -37,6 +42,9 @@ class TestPrivilegedLinuxNet(test_base.TestCase):
         self.mock_iproute = mock.patch.object(
             linux_net.pyroute2, 'IPRoute').start()
         self.fake_iproute = self.mock_iproute().__enter__()
+        # Do not share the cached IPRoute handle between tests
+        mock.patch.object(priv_linux_net, '_iproute',
+                          threading.local()).start()
 
         self.mock_exc = mock.patch.object(processutils, 'execute').start()
 
@@ -103,3 +111,95 @@ class TestPrivilegedLinuxNet(test_base.TestCase):
         priv_linux_net.create_routing_table_for_bridge(17, 'fake-bridge')
         mock_o.assert_called_once_with('/etc/iproute2/rt_tables', 'a')
         mock_o().__enter__().write.assert_called_once_with('17 fake-bridge\n')
+
+    @mock.patch.object(priv_linux_net.iproute, 'IPRoute')
+    def test__get_iproute(self, mock_ipr):
+        with priv_linux_net._get_iproute() as ip:
+            first_ip = ip
+        with priv_linux_net._get_iproute() as ip:
+            self.assertIs(first_ip, ip)
+
+        mock_ipr.assert_called_once_with()
+        ip.close.assert_not_called()
+
+    @mock.patch.object(priv_linux_net.iproute, 'IPRoute')
+    def test__get_iproute_socket_error(self, mock_ipr):
+        broken_ip = mock.Mock()
+        mock_ipr.side_effect = [broken_ip, mock.Mock()]
+
+        def _use_broken_handle():
+            with priv_linux_net._get_iproute():
+                raise OSError()
+
+        self.assertRaises(OSError, _use_broken_handle)
+        broken_ip.close.assert_called_once_with()
+
+        with priv_linux_net._get_iproute() as ip:
+            self.assertIsNot(broken_ip, ip)
+        self.assertEqual(2, mock_ipr.call_count)
+
+    @mock.patch.object(priv_linux_net.iproute, 'IPRoute')
+    def test_netlink_batch(self, mock_ipr):
+        fake_ipr = mock_ipr.return_value
+        fake_ipr.link_lookup.return_value = [7]
+        fake_ipr.addr.side_effect = netlink_exceptions.NetlinkError(
+            code=17)
+        priv_linux_net.netlink_batch([
+            ('addr', 'add', {'device': self.dev, 'address': self.ip,
+                             'mask': 32, 'family': constants.AF_INET}),
+            ('rule', 'add', {'dst': self.ip, 'table': 10, 'dst_len': 32,
+                             'family': constants.AF_INET}),
+            ('route', 'replace', {'dst': self.ip, 'table': 10, 'oif': 7,
+                                  'scope': 253}),
+            ('neigh', 'replace', {'device': self.dev, 'dst': self.ip,
+                                  'lladdr': self.mac})])
+
+        # link index is looked up once per device
+        fake_ipr.link_lookup.assert_called_once_with(ifname=self.dev)
+        fake_ipr.addr.assert_called_once_with(
+            'add', index=7, address=self.ip, mask=32,
+            family=constants.AF_INET)
+        fake_ipr.rule.assert_called_once_with(
+            'add', dst=self.ip, table=10, dst_len=32,
+            family=constants.AF_INET)
+        fake_ipr.route.assert_called_once_with(
+            'replace', dst=self.ip, table=10, oif=7,
+            scope=priv_linux_net.get_scope_name(253),
+            family=constants.AF_INET)
+        fake_ipr.neigh.assert_called_once_with(
+            'replace', ifindex=7, dst=self.ip, lladdr=self.mac)
+
+    @mock.patch.object(priv_linux_net.iproute, 'IPRoute')
+    def test_netlink_batch_no_device(self, mock_ipr):
+        fake_ipr = mock_ipr.return_value
+        fake_ipr.link_lookup.return_value = []
+        ret = priv_linux_net.netlink_batch([
+            ('addr', 'add', {'device': self.dev, 'address': self.ip,
+                             'mask': 32, 'family': constants.AF_INET}),
+            ('rule', 'add', {'dst': self.ip, 'table': 10, 'dst_len': 32,
+                             'family': constants.AF_INET})])
+
+        self.assertEqual(1, len(ret))
+        self.assertEqual(('addr', 'add'), ret[0][:2])
+        fake_ipr.addr.assert_not_called()
+        fake_ipr.rule.assert_called_once_with(
+            'add', dst=self.ip, table=10, dst_len=32,
+            family=constants.AF_INET)
+
+    @mock.patch.object(priv_linux_net.iproute, 'IPRoute')
+    def test_netlink_batch_request_error(self, mock_ipr):
+        fake_ipr = mock_ipr.return_value
+        fake_ipr.rule.side_effect = netlink_exceptions.NetlinkError(
+            code=errno.EINVAL)
+        ret = priv_linux_net.netlink_batch([
+            ('rule', 'add', {'dst': self.ip, 'table': 10, 'dst_len': 32,
+                             'family': constants.AF_INET}),
+            ('route', 'replace', {'dst': self.ip, 'table': 10, 'oif': 7,
+                                  'scope': 253})])
+
+        self.assertEqual(1, len(ret))
+        self.assertEqual(('rule', 'add'), ret[0][:2])
+        fake_ipr.route.assert_called_once_with(
+            'replace', dst=self.ip, table=10, oif=7,
+            scope=priv_linux_net.get_scope_name(253),
+            family=constants.AF_INET)
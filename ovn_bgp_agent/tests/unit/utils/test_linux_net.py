@@ -14,10 +14,13 @@
 #    under the License.
 
 import copy
+import errno
 import ipaddress
 
 from unittest import mock
 
+from pyroute2.netlink import exceptions as netlink_exceptions
+
 from ovn_bgp_agent import constants
 from ovn_bgp_agent import exceptions as agent_exc
 from ovn_bgp_agent.tests import base as test_base
@@ -83,17 +86,23 @@ class TestLinuxNet(test_base.TestCase):
                           linux_net.get_interface_index, 'fake-nic')
 
     def test_get_interface_address(self):
-        device_idx = 7
-        self.fake_ipr.link_lookup.return_value = [device_idx]
         fake_link = mock.MagicMock()
         fake_link.get_attr.return_value = self.mac
-        self.fake_ipr.get_links.return_value = [fake_link]
+        self.fake_ipr.link.return_value = [fake_link]
 
         ret = linux_net.get_interface_address('fake-nic')
         self.assertEqual(self.mac, ret)
+        self.fake_ipr.link.assert_called_once_with('get', ifname='fake-nic')
+        fake_link.get_attr.assert_called_once_with('IFLA_ADDRESS')
 
     def test_get_interface_address_index_error(self):
-        self.fake_ipr.link_lookup.return_value = ''
+        self.fake_ipr.link.return_value = []
+        self.assertRaises(agent_exc.NetworkInterfaceNotFound,
+                          linux_net.get_interface_address, 'fake-nic')
+
+    def test_get_interface_address_no_device(self):
+        self.fake_ipr.link.side_effect = netlink_exceptions.NetlinkError(
+            code=errno.ENODEV)
         self.assertRaises(agent_exc.NetworkInterfaceNotFound,
                           linux_net.get_interface_address, 'fake-nic')
 
@@ -268,6 +277,25 @@ class TestLinuxNet(test_base.TestCase):
 
         self.assertEqual([self.ip, self.ipv6], ret)
 
+    def test_get_exposed_ips_on_network_subnet(self):
+        ip0 = IPRouteDict({'prefixlen': 32,
+                           'attrs': [('IFA_ADDRESS', '10.10.1.17')]})
+        ip1 = IPRouteDict({'prefixlen': 32,
+                           'attrs': [('IFA_ADDRESS', '10.10.2.17')]})
+        ip2 = IPRouteDict({'prefixlen': 128,
+                           'attrs': [('IFA_ADDRESS', '2001:db8::17')]})
+        ip3 = IPRouteDict({'prefixlen': 128,
+                           'attrs': [('IFA_ADDRESS', '2001:db9::17')]})
+        self.fake_ipr.get_addr.return_value = [ip0, ip1, ip2, ip3]
+
+        ret = linux_net.get_exposed_ips_on_network(
+            self.dev, ipaddress.ip_network('10.10.1.0/24'))
+        self.assertEqual(['10.10.1.17'], ret)
+
+        ret = linux_net.get_exposed_ips_on_network(
+            self.dev, ipaddress.ip_network('2001:db8::/64'))
+        self.assertEqual(['2001:db8::17'], ret)
+
     def test_get_exposed_routes_on_network_v4(self):
         route0 = mock.MagicMock(
             dst=mock.Mock(),
@@ -354,6 +382,31 @@ class TestLinuxNet(test_base.TestCase):
         linux_net.delete_exposed_ips([self.ip], self.dev)
         mock_delete_exposed_ips.assert_called_once_with([self.ip], self.dev)
 
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    @mock.patch.object(linux_net, 'get_exposed_ips_on_network')
+    def test_delete_exposed_ips_on_network(self, mock_get_ips, mock_batch):
+        mock_get_ips.return_value = [self.ip, self.ipv6]
+        network = mock.Mock()
+
+        linux_net.delete_exposed_ips_on_network(self.dev, network)
+
+        mock_get_ips.assert_called_once_with(self.dev, network)
+        mock_batch.assert_called_once_with([
+            ('addr', 'del', {'device': self.dev, 'address': self.ip,
+                             'mask': 32, 'family': constants.AF_INET}),
+            ('addr', 'del', {'device': self.dev, 'address': self.ipv6,
+                             'mask': 128, 'family': constants.AF_INET6})])
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    @mock.patch.object(linux_net, 'get_exposed_ips_on_network')
+    def test_delete_exposed_ips_on_network_none(self, mock_get_ips,
+                                                mock_batch):
+        mock_get_ips.return_value = []
+
+        linux_net.delete_exposed_ips_on_network(self.dev, mock.Mock())
+
+        mock_batch.assert_not_called()
+
     @mock.patch('ovn_bgp_agent.privileged.linux_net.delete_ip_rules')
     def test_delete_ip_rules(self, mock_delete_ip_rules):
         ip_rules = {'10/128': {'table': 7, 'family': 'fake'},
@@ -499,6 +552,165 @@ class TestLinuxNet(test_base.TestCase):
                  mock.call(r2)]
         mock_route_delete.assert_has_calls(calls)
 
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.add_ip_to_dev')
+    def test_add_ips_to_dev_single_call(self, mock_add_ip_to_dev,
+                                        mock_batch):
+        linux_net.add_ips_to_dev(self.dev, [self.ip, self.ipv6])
+
+        mock_add_ip_to_dev.assert_not_called()
+        mock_batch.assert_called_once_with([
+            ('addr', 'add', {'device': self.dev, 'address': self.ip,
+                             'mask': 32, 'family': constants.AF_INET}),
+            ('addr', 'add', {'device': self.dev, 'address': self.ipv6,
+                             'mask': 128, 'family': constants.AF_INET6})])
+        self.assertIsNone(linux_net._get_netlink_batch())
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    def test_add_ips_to_dev_single_call_error(self, mock_batch):
+        mock_batch.return_value = [('addr', 'add', 'fake-error')]
+
+        self.assertRaises(agent_exc.NetlinkBatchFailed,
+                          linux_net.add_ips_to_dev, self.dev,
+                          [self.ip, self.ipv6])
+        mock_batch.assert_called_once()
+        self.assertIsNone(linux_net._get_netlink_batch())
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    def test_add_ips_to_dev_batch_error(self, mock_batch):
+        mock_batch.return_value = [('addr', 'add', 'fake-error')]
+        with linux_net.NetlinkBatch() as batch:
+            linux_net.add_ips_to_dev(self.dev, [self.ip])
+
+        # the errors are left to the batch the IPs were merged into
+        self.assertEqual([('addr', 'add', 'fake-error')], batch.errors)
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.add_ip_to_dev')
+    def test_add_ips_to_dev_batch(self, mock_add_ip_to_dev, mock_batch):
+        with linux_net.NetlinkBatch():
+            linux_net.add_ips_to_dev(self.dev, [self.ip, self.ipv6])
+            mock_batch.assert_not_called()
+
+        mock_add_ip_to_dev.assert_not_called()
+        mock_batch.assert_called_once_with([
+            ('addr', 'add', {'device': self.dev, 'address': self.ip,
+                             'mask': 32, 'family': constants.AF_INET}),
+            ('addr', 'add', {'device': self.dev, 'address': self.ipv6,
+                             'mask': 128, 'family': constants.AF_INET6})])
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    def test_netlink_batch_flush_on_size(self, mock_batch):
+        with linux_net.NetlinkBatch(size=2):
+            linux_net.add_ip_rule(self.ip, 7)
+            linux_net.add_ip_rule(self.ipv6, 7)
+            mock_batch.assert_called_once()
+            linux_net.add_ip_rule('10.10.1.17', 7)
+
+        self.assertEqual(2, mock_batch.call_count)
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    def test_netlink_batch_existing(self, mock_batch):
+        existing_ips = {self.dev: [self.ip]}
+        existing_rules = {
+            '{}/32'.format(self.ip): {'table': 7,
+                                      'family': constants.AF_INET}}
+        with linux_net.NetlinkBatch(existing_ips=existing_ips,
+                                    existing_rules=existing_rules):
+            linux_net.add_ips_to_dev(self.dev, [self.ip, self.ipv6])
+            linux_net.add_ip_rule(self.ip, 7)
+            linux_net.add_ip_rule(self.ip, 8)
+
+        mock_batch.assert_called_once_with([
+            ('addr', 'add', {'device': self.dev, 'address': self.ipv6,
+                             'mask': 128, 'family': constants.AF_INET6}),
+            ('rule', 'add', {'dst': self.ip, 'table': 8, 'dst_len': 32,
+                             'family': constants.AF_INET})])
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    def test_netlink_batch_existing_deleted(self, mock_batch):
+        existing_rules = {
+            '{}/32'.format(self.ip): {'table': 7,
+                                      'family': constants.AF_INET}}
+        with linux_net.NetlinkBatch(existing_rules=existing_rules):
+            linux_net.del_ip_rule(self.ip, 7)
+            linux_net.add_ip_rule(self.ip, 7)
+
+        rule = {'dst': self.ip, 'table': 7, 'dst_len': 32,
+                'family': constants.AF_INET}
+        mock_batch.assert_called_once_with([('rule', 'del', rule),
+                                            ('rule', 'add', rule)])
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    def test_netlink_batch_nested(self, mock_batch):
+        with linux_net.NetlinkBatch():
+            with linux_net.NetlinkBatch():
+                linux_net.add_ip_rule(self.ip, 7)
+            linux_net.add_ip_rule(self.ipv6, 7)
+
+        mock_batch.assert_called_once_with([
+            ('rule', 'add', {'dst': self.ip, 'table': 7, 'dst_len': 32,
+                             'family': constants.AF_INET}),
+            ('rule', 'add', {'dst': self.ipv6, 'table': 7, 'dst_len': 128,
+                             'family': constants.AF_INET6})])
+        self.assertIsNone(linux_net._get_netlink_batch())
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    def test_netlink_batch_on_errors(self, mock_batch):
+        errors = [('rule', 'add', 'fake-error')]
+        mock_batch.return_value = errors
+        on_errors = mock.Mock()
+        with linux_net.NetlinkBatch(on_errors=on_errors) as batch:
+            linux_net.add_ip_rule(self.ip, 7)
+
+        on_errors.assert_called_once_with(errors)
+        self.assertEqual(errors, batch.errors)
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    def test_netlink_batch_get_state(self, mock_batch):
+        existing_rules = {'{}/32'.format(self.ip): {
+            'table': 7, 'family': constants.AF_INET}}
+        with linux_net.NetlinkBatch(existing_ips={'fake-dev': {self.ip}},
+                                    existing_rules=existing_rules) as batch:
+            linux_net.add_ip_rule(self.ipv6, 7)
+            linux_net.del_ip_rule(self.ip, 7)
+            batch.add('route', 'replace', dst=self.ip, dst_len=32, oif=3,
+                      table=7)
+
+        self.assertEqual({('fake-dev', self.ip)}, batch.get_state('addr'))
+        self.assertEqual({(self.ipv6, 128, 7)}, batch.get_state('rule'))
+        self.assertEqual({(7, self.ip, 32, None, 3)},
+                         batch.get_state('route'))
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    def test_netlink_batch_exception(self, mock_batch):
+        def _fail_in_batch():
+            with linux_net.NetlinkBatch():
+                linux_net.add_ip_rule(self.ip, 7)
+                raise agent_exc.InvalidPortIP(ip=self.ip)
+
+        self.assertRaises(agent_exc.InvalidPortIP, _fail_in_batch)
+        mock_batch.assert_not_called()
+        self.assertIsNone(linux_net._get_netlink_batch())
+
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    def test_netlink_batch_nested_exception_handled(self, mock_batch):
+        with linux_net.NetlinkBatch():
+            try:
+                with linux_net.NetlinkBatch():
+                    linux_net.add_ip_rule(self.ip, 7)
+                    raise agent_exc.InvalidPortIP(ip=self.ip)
+            except agent_exc.InvalidPortIP:
+                pass
+            linux_net.add_ip_rule(self.ipv6, 7)
+
+        mock_batch.assert_called_once_with([
+            ('rule', 'add', {'dst': self.ip, 'table': 7, 'dst_len': 32,
+                             'family': constants.AF_INET}),
+            ('rule', 'add', {'dst': self.ipv6, 'table': 7, 'dst_len': 128,
+                             'family': constants.AF_INET6})])
+        self.assertIsNone(linux_net._get_netlink_batch())
+
     @mock.patch('ovn_bgp_agent.privileged.linux_net.del_ip_from_dev')
     def test_del_ips_from_dev(self, mock_del_ip_from_dev):
         ips = [self.ip, self.ipv6]
@@ -551,6 +763,17 @@ class TestLinuxNet(test_base.TestCase):
         mock_rule_delete.assert_called_once_with(expected_args)
         mock_del_ip_nei.assert_called_once_with(self.ip, self.mac, self.dev)
 
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.rule_delete')
+    def test_del_ip_rule_batch(self, mock_rule_delete, mock_batch):
+        with linux_net.NetlinkBatch():
+            linux_net.del_ip_rule(self.ip, 7)
+
+        mock_rule_delete.assert_not_called()
+        mock_batch.assert_called_once_with([
+            ('rule', 'del', {'dst': self.ip, 'table': 7, 'dst_len': 32,
+                             'family': constants.AF_INET})])
+
     @mock.patch.object(linux_net, 'del_ip_nei')
     @mock.patch('ovn_bgp_agent.privileged.linux_net.rule_delete')
     def test_del_ip_rule_ipv6(self, mock_rule_delete, mock_del_ip_nei):
@@ -580,6 +803,16 @@ class TestLinuxNet(test_base.TestCase):
         linux_net.add_unreachable_route('fake-vrf')
         mock_add_route.assert_called_once_with('fake-vrf')
 
+    def test__get_route_dst(self):
+        self.assertEqual((constants.IP_VERSION_4, self.ip, 32),
+                         linux_net._get_route_dst(self.ip))
+        self.assertEqual((constants.IP_VERSION_6, self.ipv6, 128),
+                         linux_net._get_route_dst(self.ipv6))
+        self.assertEqual((constants.IP_VERSION_4, '10.10.1.0', '24'),
+                         linux_net._get_route_dst('10.10.1.17', '24'))
+        self.assertEqual((constants.IP_VERSION_6, '2002::', '64'),
+                         linux_net._get_route_dst('2002::1234:abcd', '64'))
+
     @mock.patch('ovn_bgp_agent.privileged.linux_net.route_create')
     def test_add_ip_route(self, mock_route_create):
         routes = {}
@@ -595,6 +828,21 @@ class TestLinuxNet(test_base.TestCase):
         self.assertEqual(expected_routes, routes)
         mock_route_create.assert_not_called()
 
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.route_create')
+    def test_add_ip_route_batch(self, mock_route_create, mock_batch):
+        routes = {}
+        with linux_net.NetlinkBatch():
+            linux_net.add_ip_route(routes, self.ip, 7, self.dev)
+
+        route = {'dst': self.ip, 'dst_len': 32, 'oif': mock.ANY,
+                 'proto': 3, 'scope': 253, 'table': 7}
+        self.assertEqual({self.dev: [{'route': route, 'vlan': None}]},
+                         routes)
+        self.fake_ipr.route.assert_not_called()
+        mock_route_create.assert_not_called()
+        mock_batch.assert_called_once_with([('route', 'replace', route)])
+
     @mock.patch('ovn_bgp_agent.privileged.linux_net.route_create')
     def test_add_ip_route_ipv6(self, mock_route_create):
         routes = {}
@@ -712,6 +960,26 @@ class TestLinuxNet(test_base.TestCase):
         self.assertEqual({self.dev: []}, routes)
         mock_route_delete.assert_called_once_with(route)
 
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.netlink_batch')
+    @mock.patch('ovn_bgp_agent.privileged.linux_net.route_delete')
+    def test_del_ip_route_batch(self, mock_route_delete, mock_batch):
+        routes = {
+            self.dev: [{'route': {'dst': self.ip,
+                                  'dst_len': 32,
+                                  'oif': mock.ANY,
+                                  'proto': 3,
+                                  'scope': 253,
+                                  'table': 7},
+                        'vlan': None}]}
+        route = copy.deepcopy(routes[self.dev][0]['route'])
+
+        with linux_net.NetlinkBatch():
+            linux_net.del_ip_route(routes, self.ip, 7, self.dev)
+
+        self.assertEqual({self.dev: []}, routes)
+        mock_route_delete.assert_not_called()
+        mock_batch.assert_called_once_with([('route', 'del', route)])
+
     @mock.patch('ovn_bgp_agent.privileged.linux_net.route_delete')
     def test_del_ip_route_ipv6(self, mock_route_delete):
         routes = {
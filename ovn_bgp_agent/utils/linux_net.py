@@ -12,15 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import errno
 import ipaddress
 import random
 import re
+import socket
 import sys
+import threading
 
 import netaddr
 from oslo_log import log as logging
 import pyroute2
 from pyroute2.netlink import exceptions as netlink_exceptions
+from pyroute2.netlink.rtnl import ndmsg
 import tenacity
 
 from ovn_bgp_agent import constants
@@ -30,6 +34,150 @@ from ovn_bgp_agent.utils import common as common_utils
 
 LOG = logging.getLogger(__name__)
 
+# Maximum number of netlink requests queued in a NetlinkBatch before they are
+# flushed, so that a single privsep call does not grow unbounded
+NETLINK_BATCH_SIZE = 256
+
+_netlink_batch = threading.local()
+
+# {ip_version: (network class, host route mask)}
+_IP_NETWORK_CLASS_AND_HOST_MASK = {
+    constants.IP_VERSION_4: (ipaddress.IPv4Network, 32),
+    constants.IP_VERSION_6: (ipaddress.IPv6Network, 128),
+}
+
+
+class NetlinkBatch(object):
+    """Group IP address, rule, neighbor and route requests
+
+    While a batch is active on the current thread, add_ips_to_dev,
+    add_ip_rule, add_ip_nei, add_ip_route, del_ip_rule, del_ip_route and
+    delete_exposed_ips_on_network queue their netlink requests instead of
+    applying them one by one. The queued requests are applied through a
+    single privileged call (and a single IPRoute socket) when the batch size
+    is reached and when leaving the context manager, unless an exception is
+    raised within it. A failing request is logged and does not prevent the
+    rest of them from being applied. The failed requests are kept in the
+    errors attribute and, if raise_on_error is set, NetlinkBatchFailed is
+    raised once all of them were applied.
+
+    Nested batches are merged into the outermost one, so the errors are
+    only kept (and raised) by the outermost one.
+
+    The IPs ({nic: ips}) and rules (as returned by get_ovn_ip_rules) already
+    on the host can be passed as existing_ips and existing_rules, so that
+    adding them again is skipped and only the missing ones are requested.
+
+    If on_errors is passed, it is called with the failed requests every time
+    some of them fail when flushing the batch.
+    """
+
+    def __init__(self, size=NETLINK_BATCH_SIZE, existing_ips=None,
+                 existing_rules=None, raise_on_error=False, on_errors=None):
+        self.size = size
+        self.raise_on_error = raise_on_error
+        self.on_errors = on_errors
+        self.operations = []
+        self.errors = []
+        self._outer = None
+        self._existing = {
+            'addr': {(nic, ip) for nic, ips in (existing_ips or {}).items()
+                     for ip in ips},
+            'rule': set(),
+            'route': set(),
+        }
+        for rule_dst, rule_info in (existing_rules or {}).items():
+            dst, dst_len = rule_dst.split('/')
+            self._existing['rule'].add((dst, int(dst_len), rule_info['table']))
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.commit()
+
+    def begin(self):
+        self._outer = getattr(_netlink_batch, 'current', None)
+        if not self._outer:
+            _netlink_batch.current = self
+
+    def add(self, obj, command, **kwargs):
+        existing = self._existing.get(obj)
+        if existing is not None:
+            key = self._get_existing_key(obj, kwargs)
+            if command == 'del':
+                # NOTE: it must be added again if requested later on
+                existing.discard(key)
+            elif command == 'add' and key in existing:
+                return
+            else:
+                existing.add(key)
+        self.operations.append((obj, command, kwargs))
+        if len(self.operations) >= self.size:
+            self.flush()
+
+    def _get_existing_key(self, obj, kwargs):
+        if obj == 'addr':
+            return (kwargs['device'], kwargs['address'])
+        if obj == 'rule':
+            return (kwargs['dst'], kwargs['dst_len'], kwargs['table'])
+        return (kwargs.get('table'), kwargs.get('dst'), kwargs.get('dst_len'),
+                kwargs.get('gateway'), kwargs.get('oif'))
+
+    def get_state(self, obj):
+        """Return the addresses, rules or routes there once it is applied
+
+        That is, the existing ones plus the ones requested, minus the ones
+        deleted through the batch. They are keyed as (device, address),
+        (dst, dst_len, table) and (table, dst, dst_len, gateway, oif).
+        """
+        return set(self._existing[obj])
+
+    def flush(self):
+        if not self.operations:
+            return []
+        operations, self.operations = self.operations, []
+        LOG.debug("Applying %s batched netlink requests", len(operations))
+        errors = ovn_bgp_agent.privileged.linux_net.netlink_batch(operations)
+        if errors:
+            LOG.warning("%s out of %s batched netlink requests failed",
+                        len(errors), len(operations))
+            self.errors.extend(errors)
+            if self.on_errors:
+                self.on_errors(errors)
+        return errors or []
+
+    def commit(self):
+        if self._outer:
+            # NOTE: the requests are left to the outermost batch
+            return
+        try:
+            self.flush()
+        finally:
+            _netlink_batch.current = None
+        if self.raise_on_error and self.errors:
+            raise agent_exc.NetlinkBatchFailed(failed=len(self.errors),
+                                               errors=self.errors)
+
+    def abort(self):
+        # NOTE: the requests queued by the outermost batch are not applied
+        # if an exception is raised within it. A nested batch leaves them
+        # to the outermost one, as the exception may be handled in between
+        if not self._outer:
+            if self.operations:
+                LOG.debug("Discarding %s batched netlink requests",
+                          len(self.operations))
+            self.operations = []
+            _netlink_batch.current = None
+
+
+def _get_netlink_batch():
+    return getattr(_netlink_batch, 'current', None)
+
 
 def get_ip_version(ip):
     # IP network can consume both an IP address and a network with cidr
@@ -70,12 +218,17 @@ def get_interface_index(nic):
     stop=tenacity.stop_after_delay(8),
     reraise=True)
 def get_interface_address(nic):
+    # NOTE: a single RTM_GETLINK request for the given nic, instead of
+    # looking up its index first and then getting the link by index
     try:
         with pyroute2.IPRoute() as ipr:
-            idx = ipr.link_lookup(ifname=nic)[0]
-            return ipr.get_links(idx)[0].get_attr('IFLA_ADDRESS')
+            return ipr.link('get', ifname=nic)[0].get_attr('IFLA_ADDRESS')
     except IndexError:
         raise agent_exc.NetworkInterfaceNotFound(device=nic)
+    except netlink_exceptions.NetlinkError as e:
+        if e.code == errno.ENODEV:
+            raise agent_exc.NetworkInterfaceNotFound(device=nic)
+        raise
 
 
 @tenacity.retry(
@@ -409,7 +562,21 @@ def get_nic_ip(nic, prefixlen_filter=None):
 
 def get_exposed_ips_on_network(nic, network):
     exposed_ips = get_exposed_ips(nic)
-    return [ip for ip in exposed_ips if ipaddress.ip_address(ip) in network]
+    if not isinstance(network, (ipaddress.IPv4Network,
+                                ipaddress.IPv6Network)):
+        return [ip for ip in exposed_ips
+                if ipaddress.ip_address(ip) in network]
+
+    # NOTE: mask the packed addresses instead of building an ipaddress
+    # object per exposed IP
+    is_ipv6 = network.version == constants.IP_VERSION_6
+    family = socket.AF_INET6 if is_ipv6 else socket.AF_INET
+    net_address = int(network.network_address)
+    net_mask = int(network.netmask)
+    return [ip for ip in exposed_ips
+            if (':' in ip) == is_ipv6 and
+            int.from_bytes(socket.inet_pton(family, ip),
+                           'big') & net_mask == net_address]
 
 
 @tenacity.retry(
@@ -456,7 +623,22 @@ def get_ovn_ip_rules(routing_tables):
 
 
 def delete_exposed_ips(ips, nic):
-    ovn_bgp_agent.privileged.linux_net.delete_exposed_ips(ips, nic)
+    # NOTE: privsep can only serialize lists, not sets
+    ovn_bgp_agent.privileged.linux_net.delete_exposed_ips(list(ips), nic)
+
+
+def delete_exposed_ips_on_network(nic, network):
+    # NOTE: all the IPs are deleted through a single privileged call (and
+    # netlink socket), merged into the current batch if there is one
+    with NetlinkBatch():
+        batch = _get_netlink_batch()
+        for ip in get_exposed_ips_on_network(nic, network):
+            ip_version = (constants.IP_VERSION_6 if ':' in ip
+                          else constants.IP_VERSION_4)
+            batch.add(
+                'addr', 'del', device=nic, address=ip,
+                mask=_IP_NETWORK_CLASS_AND_HOST_MASK[ip_version][1],
+                family=common_utils.IP_VERSION_FAMILY_MAP[ip_version])
 
 
 def delete_ip_rules(ip_rules):
@@ -559,6 +741,21 @@ def del_ndp_proxy(ip, dev, vlan=None):
 
 
 def add_ips_to_dev(nic, ips, clear_local_route_at_table=False):
+    if not clear_local_route_at_table:
+        # NOTE: all the IPs are added through a single privileged call (and
+        # netlink socket), merged into the current batch if there is one.
+        # Otherwise, as when adding them one by one, it raises if any of
+        # them could not be added
+        with NetlinkBatch(raise_on_error=True):
+            batch = _get_netlink_batch()
+            for ip in ips:
+                net = netaddr.IPNetwork(ip)
+                batch.add(
+                    'addr', 'add', device=nic, address=str(net.ip),
+                    mask=32 if net.version == constants.IP_VERSION_4 else 128,
+                    family=common_utils.IP_VERSION_FAMILY_MAP[net.version])
+        return
+
     already_added_ips = []
     for ip in ips:
         try:
@@ -601,7 +798,11 @@ def create_rule_from_ip(ip, table):
 def add_ip_rule(ip, table, dev=None, lladdr=None):
     rule = create_rule_from_ip(ip, table)
 
-    ovn_bgp_agent.privileged.linux_net.rule_create(rule)
+    batch = _get_netlink_batch()
+    if batch:
+        batch.add('rule', 'add', **rule)
+    else:
+        ovn_bgp_agent.privileged.linux_net.rule_create(rule)
 
     if lladdr:
         add_ip_nei(ip, lladdr, dev)
@@ -614,13 +815,24 @@ def add_ip_nei(ip, lladdr, dev):
     param lladdr: link layer address of the neighbor to associate to that IP
     param dev: the interface to which the neighbor is attached
     """
+    batch = _get_netlink_batch()
+    if batch:
+        ip_version = get_ip_version(ip)
+        batch.add('neigh', 'replace', device=dev, dst=ip, lladdr=lladdr,
+                  family=common_utils.IP_VERSION_FAMILY_MAP[ip_version],
+                  state=ndmsg.states['permanent'])
+        return
     ovn_bgp_agent.privileged.linux_net.add_ip_nei(ip, lladdr, dev)
 
 
 def del_ip_rule(ip, table, dev=None, lladdr=None):
     rule = create_rule_from_ip(ip, table)
 
-    ovn_bgp_agent.privileged.linux_net.rule_delete(rule)
+    batch = _get_netlink_batch()
+    if batch:
+        batch.add('rule', 'del', **rule)
+    else:
+        ovn_bgp_agent.privileged.linux_net.rule_delete(rule)
 
     if lladdr:
         del_ip_nei(ip, lladdr, dev)
@@ -640,6 +852,20 @@ def add_unreachable_route(vrf_name):
     ovn_bgp_agent.privileged.linux_net.add_unreachable_route(vrf_name)
 
 
+def _get_route_dst(ip_address, mask=None):
+    """Return the IP version, dst and dst_len of the route to ip_address/mask
+
+    Without mask, the route is a host route (/32 or /128). Otherwise the dst
+    is the address of the network.
+    """
+    ip_version = get_ip_version(ip_address)
+    network_class, host_mask = _IP_NETWORK_CLASS_AND_HOST_MASK[ip_version]
+    if not mask:
+        return ip_version, ip_address, host_mask
+    network = network_class('{}/{}'.format(ip_address, mask), strict=False)
+    return ip_version, str(network.network_address), mask
+
+
 @tenacity.retry(
     retry=tenacity.retry_if_exception_type(
         netlink_exceptions.NetlinkDumpInterrupted),
@@ -648,20 +874,7 @@ def add_unreachable_route(vrf_name):
     reraise=True)
 def add_ip_route(ovn_routing_tables_routes, ip_address, route_table, dev,
                  vlan=None, mask=None, via=None):
-    net_ip = ip_address
-    if not mask:  # default /32 or /128
-        if get_ip_version(ip_address) == constants.IP_VERSION_6:
-            mask = 128
-        else:
-            mask = 32
-    else:
-        ip = '{}/{}'.format(ip_address, mask)
-        if get_ip_version(ip_address) == constants.IP_VERSION_6:
-            net_ip = '{}'.format(ipaddress.IPv6Network(
-                ip, strict=False).network_address)
-        else:
-            net_ip = '{}'.format(ipaddress.IPv4Network(
-                ip, strict=False).network_address)
+    ip_version, net_ip, mask = _get_route_dst(ip_address, mask)
 
     if vlan:
         oif_name = '{}.{}'.format(dev, vlan)
@@ -684,37 +897,32 @@ def add_ip_route(ovn_routing_tables_routes, ip_address, route_table, dev,
         route['scope'] = 0
     else:
         route['scope'] = 253
-    if get_ip_version(net_ip) == constants.IP_VERSION_6:
+    if ip_version == constants.IP_VERSION_6:
         route['family'] = constants.AF_INET6
         del route['scope']
 
-    with pyroute2.IPRoute() as ipr:
-        if not ipr.route('show', **route):
-            LOG.debug("Creating route at table %s: %s", route_table, route)
-            ovn_bgp_agent.privileged.linux_net.route_create(route)
-            LOG.debug("Route created at table %s: %s", route_table, route)
-        else:
-            LOG.debug("Route already existing: %s", route)
+    batch = _get_netlink_batch()
+    if batch:
+        # NOTE: routes are created with 'replace', so there is no need to
+        # check if they already exist when batching them
+        batch.add('route', 'replace', **route)
+    else:
+        with pyroute2.IPRoute() as ipr:
+            if not ipr.route('show', **route):
+                LOG.debug("Creating route at table %s: %s", route_table,
+                          route)
+                ovn_bgp_agent.privileged.linux_net.route_create(route)
+                LOG.debug("Route created at table %s: %s", route_table,
+                          route)
+            else:
+                LOG.debug("Route already existing: %s", route)
     route_info = {'vlan': vlan, 'route': route}
     ovn_routing_tables_routes.setdefault(dev, []).append(route_info)
 
 
 def del_ip_route(ovn_routing_tables_routes, ip_address, route_table, dev,
                  vlan=None, mask=None, via=None):
-    net_ip = ip_address
-    if not mask:  # default /32 or /128
-        if get_ip_version(ip_address) == constants.IP_VERSION_6:
-            mask = 128
-        else:
-            mask = 32
-    else:
-        ip = '{}/{}'.format(ip_address, mask)
-        if get_ip_version(ip_address) == constants.IP_VERSION_6:
-            net_ip = '{}'.format(ipaddress.IPv6Network(
-                ip, strict=False).network_address)
-        else:
-            net_ip = '{}'.format(ipaddress.IPv4Network(
-                ip, strict=False).network_address)
+    ip_version, net_ip, mask = _get_route_dst(ip_address, mask)
 
     try:
         if vlan:
@@ -735,12 +943,16 @@ def del_ip_route(ovn_routing_tables_routes, ip_address, route_table, dev,
         route['scope'] = 0
     else:
         route['scope'] = 253
-    if get_ip_version(net_ip) == constants.IP_VERSION_6:
+    if ip_version == constants.IP_VERSION_6:
         route['family'] = constants.AF_INET6
         del route['scope']
 
     LOG.debug("Deleting route at table %s: %s", route_table, route)
-    ovn_bgp_agent.privileged.linux_net.route_delete(route)
+    batch = _get_netlink_batch()
+    if batch:
+        batch.add('route', 'del', **route)
+    else:
+        ovn_bgp_agent.privileged.linux_net.route_delete(route)
     LOG.debug("Route deleted at table %s: %s", route_table, route)
     route_info = {'vlan': vlan, 'route': route}
     if route_info in ovn_routing_tables_routes.get(dev, []):